@@ -0,0 +1,32 @@
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WORKERS", "2"))
+# Threads let concurrent requests share a batch (see MicroBatcher in inference.py)
+threads = int(os.environ.get("THREADS", "16"))
+timeout = 120
+# Load the model once in the master so forked workers share its weight pages
+# copy-on-write. ONNX Runtime sessions don't survive fork, so that backend
+# loads in each worker instead.
+preload_app = os.environ.get("PRELOAD_APP", "0" if os.environ.get("QA_BACKEND") == "onnx" else "1") == "1"
+# Split the cores between workers instead of every worker using all of them.
+# The ONNX session is built when a worker imports the app, before
+# post_worker_init, so its share goes through the environment.
+cores_per_worker = max(1, multiprocessing.cpu_count() // workers)
+os.environ.setdefault("ONNX_THREADS", str(cores_per_worker))
+
+
+def when_ready(server):
+    # Keep the garbage collector from writing to (and so copying) the
+    # master's objects in every worker
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    import inference
+    if inference.QA_BACKEND != "onnx":
+        import torch
+        torch.set_num_threads(cores_per_worker)
+    inference.warm_up()
@@ -2,6 +2,10 @@ from flask import Flask, jsonify, request
 from transformers import AutoModelForQuestionAnswering, AutoTokenizer, pipeline
 import os
 import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -14,13 +18,39 @@ logger = logging.getLogger(__name__)
 model = None
 tokenizer = None
 qa_pipeline = None
+ready = False  # set once warm-up inference has run; /ping reports healthy after that
+
+# "local" loads the saved model from MODEL_DIR (model/ and tokenizer/, as
+# written by helpers/model_save.py); "huggingface" downloads it at startup
+MODEL_SOURCE = os.environ.get("MODEL_SOURCE", "huggingface")
+MODEL_DIR = os.environ.get("MODEL_DIR", "/opt/ml/model")
+
+# Dynamic batching: concurrent /invocations requests are collected for up to
+# BATCH_WINDOW_MS or MAX_BATCH_SIZE requests and run through the model as one
+# padded batch. BATCH_WINDOW_MS=0 runs every request on its own.
+BATCH_WINDOW_MS = float(os.environ.get("BATCH_WINDOW_MS", "10"))
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "8"))
+REQUEST_TIMEOUT = 60  # seconds a request waits for its batch
+# Long contexts are split into overlapping windows of max_seq_len tokens
+# (doc_stride shared between neighbours); the best span across all windows
+# wins. WINDOW_BATCH_SIZE windows, from any request in the batch, go through
+# the model per forward pass.
+QA_ARGS = {"max_answer_len": 512, "min_answer_len": 500, "max_seq_len": 384, "doc_stride": 128}
+WINDOW_BATCH_SIZE = int(os.environ.get("WINDOW_BATCH_SIZE", "16"))
+# "pytorch" serves the transformers pipeline; "onnx" serves the int8 ONNX
+# export written by helpers/onnx_export.py (ONNX_MODEL picks another file)
+QA_BACKEND = os.environ.get("QA_BACKEND", "pytorch")
+ONNX_MODEL = os.environ.get("ONNX_MODEL", "/opt/ml/model/onnx/model.int8.onnx")
+# Intra-op threads of the ONNX session; 0 lets onnxruntime use every core.
+# gunicorn.conf.py sets it to this worker's share of the cores.
+ONNX_THREADS = int(os.environ.get("ONNX_THREADS", "0"))
 
 def initialize_model():
     """
     Load the model and tokenizer.
     """
     global model, tokenizer, qa_pipeline
-    model_dir = "/opt/ml/model"  # Update if necessary
+    model_dir = MODEL_DIR
     try:
         logger.info("Loading model...")
         if not os.path.exists(os.path.join(model_dir, "model")):
@@ -28,7 +58,13 @@ def initialize_model():
         if not os.path.exists(os.path.join(model_dir, "tokenizer")):
             raise FileNotFoundError("Tokenizer directory not found.")
         
-        model = AutoModelForQuestionAnswering.from_pretrained(os.path.join(model_dir, "model"))
+        if not os.path.exists(os.path.join(model_dir, "model", "model.safetensors")):
+            logger.warning("No model.safetensors; weights will be read and copied in full.")
+
+        # safetensors weights are memory-mapped, and low_cpu_mem_usage skips
+        # the random initialisation that would otherwise be overwritten
+        model = AutoModelForQuestionAnswering.from_pretrained(os.path.join(model_dir, "model"), low_cpu_mem_usage=True)
+        model.eval()
         tokenizer = AutoTokenizer.from_pretrained(os.path.join(model_dir, "tokenizer"))
         qa_pipeline = pipeline("question-answering", model=model, tokenizer=tokenizer)
         logger.info("Model loaded successfully.")
@@ -49,8 +85,120 @@ def intialize_model_from_huggingface():
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
 
+def initialize_onnx_model(threads=ONNX_THREADS):
+    """
+    Load the ONNX model and the saved tokenizer, with a session running
+    threads intra-op threads.
+    """
+    global model, tokenizer, qa_pipeline
+    try:
+        logger.info(f"Loading ONNX model {ONNX_MODEL}...")
+        from onnx_qa import OnnxQuestionAnswerer
+        tokenizer = AutoTokenizer.from_pretrained(os.path.join(MODEL_DIR, "tokenizer"))
+        qa_pipeline = OnnxQuestionAnswerer(ONNX_MODEL, tokenizer, threads=threads)
+        model = qa_pipeline.session
+        logger.info("ONNX model loaded successfully.")
+    except Exception as e:
+        logger.error(f"Failed to load model: {e}")
+
+def warm_up():
+    """
+    Run one inference so lazy initialisation (thread pools, first-call
+    allocations) happens before traffic arrives. Under gunicorn this runs
+    in each worker after fork, from gunicorn.conf.py.
+    """
+    global ready
+    if qa_pipeline is None:
+        return
+    try:
+        start = time.monotonic()
+        qa_pipeline(question="What is this?", context="This is a warm-up request.", **QA_ARGS)
+        ready = True
+        logger.info(f"Warm-up finished in {time.monotonic() - start:.2f} s")
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+
+def answer_batch(questions, contexts):
+    """
+    Run several question/context pairs through the pipeline in one batch.
+    """
+    results = qa_pipeline(question=questions, context=contexts, batch_size=WINDOW_BATCH_SIZE, **QA_ARGS)
+    if isinstance(results, dict):
+        results = [results]
+    return [result["answer"] for result in results]
+
+class MicroBatcher:
+    """
+    Collects concurrent requests and answers them together. The first
+    request opens a window of window_ms; the batch runs when the window
+    closes or max_batch_size requests have arrived, and each caller gets
+    its answer through a Future.
+    """
+
+    def __init__(self, run_batch, window_ms, max_batch_size):
+        self.run_batch = run_batch
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, question, context):
+        future = Future()
+        self._queue.put((question, context, future))
+        self.start()
+        return future
+
+    def start(self):
+        # Started on first use, so a gunicorn worker forked after import gets its own thread
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self.run, name="qa-batcher", daemon=True)
+                    self._thread.start()
+
+    def run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.batches += 1
+            self.items += len(batch)
+            logger.debug(f"Running batch of {len(batch)}")
+            self.answer(batch)
+
+    def answer(self, batch):
+        try:
+            answers = self.run_batch([item[0] for item in batch], [item[1] for item in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][2].set_exception(e)
+                return
+            # One bad request shouldn't fail the rest; answer them one by one
+            for item in batch:
+                self.answer([item])
+            return
+        for item, answer in zip(batch, answers):
+            item[2].set_result(answer)
+
+batcher = MicroBatcher(answer_batch, BATCH_WINDOW_MS, MAX_BATCH_SIZE)
+
 # Call initialize_model during startup
-intialize_model_from_huggingface()
+if QA_BACKEND == "onnx":
+    initialize_onnx_model()
+elif MODEL_SOURCE == "local":
+    initialize_model()
+else:
+    intialize_model_from_huggingface()
 
 @app.route('/', methods=['GET'])
 def home():
@@ -62,9 +210,9 @@ def home():
 @app.route('/ping', methods=['GET'])
 def ping():
     """
-    Health check endpoint required by SageMaker.
+    Health check endpoint required by SageMaker. Unhealthy until warm-up has run.
     """
-    health = model is not None and tokenizer is not None and qa_pipeline is not None
+    health = ready and model is not None and tokenizer is not None and qa_pipeline is not None
     status = 200 if health else 503
     logger.debug(f"Health check: {'healthy' if health else 'unhealthy'}")
     return jsonify({"status": "healthy" if health else "unhealthy"}), status
@@ -88,12 +236,16 @@ def invocations():
 
     try:
         logger.info(f"Received question: {question}")
-        result = qa_pipeline(question=question, context=context, max_answer_len=512, min_answer_len=500)
+        if BATCH_WINDOW_MS > 0:
+            answer = batcher.submit(question, context).result(timeout=REQUEST_TIMEOUT)
+        else:
+            answer = qa_pipeline(question=question, context=context, batch_size=WINDOW_BATCH_SIZE, **QA_ARGS)["answer"]
         logger.info("Inference completed successfully.")
-        return jsonify({"answer": result["answer"]})
+        return jsonify({"answer": answer})
     except Exception as e:
         logger.error(f"Inference error: {e}")
         return jsonify({"error": str(e)}), 500
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8080)
\ No newline at end of file
+    warm_up()
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "8080")))
\ No newline at end of file
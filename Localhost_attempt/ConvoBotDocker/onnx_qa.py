@@ -0,0 +1,78 @@
+import numpy as np
+import onnxruntime
+
+
+class OnnxQuestionAnswerer:
+    """
+    Extractive QA over an ONNX export of the model, callable like the
+    transformers question-answering pipeline: a question and context give a
+    dict with answer, score, start and end; lists give a list of dicts.
+    Long contexts are split into overlapping windows (max_seq_len tokens,
+    doc_stride overlap); windows of every item are scored batch_size at a
+    time (all in one session call by default) and the best span across an
+    item's windows is its answer.
+    """
+
+    def __init__(self, model_path, tokenizer, max_seq_len=384, doc_stride=128, threads=0):
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads  # 0 lets onnxruntime use every core
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.tokenizer = tokenizer
+        self.max_seq_len = max_seq_len
+        self.doc_stride = doc_stride
+
+    def __call__(self, question, context, max_answer_len=15, batch_size=None, max_seq_len=None, doc_stride=None, **kwargs):
+        single = isinstance(question, str)
+        questions = [question] if single else list(question)
+        contexts = [context] if single else list(context)
+        encoded = self.tokenizer(
+            questions, contexts,
+            truncation="only_second",
+            max_length=max_seq_len or self.max_seq_len,
+            stride=doc_stride or self.doc_stride,
+            return_overflowing_tokens=True,
+            return_offsets_mapping=True,
+            padding="longest",
+            return_tensors="np",
+        )
+        windows = len(encoded["input_ids"])
+        step = batch_size or windows
+        logits = [
+            self.session.run(None, {name: encoded[name][first:first + step] for name in self.input_names})[:2]
+            for first in range(0, windows, step)
+        ]
+        start_logits = np.concatenate([part[0] for part in logits])
+        end_logits = np.concatenate([part[1] for part in logits])
+
+        best = [None] * len(questions)
+        for window, item in enumerate(encoded["overflow_to_sample_mapping"]):
+            context_mask = np.array([sequence == 1 for sequence in encoded.sequence_ids(window)])
+            score, start, end = best_span(start_logits[window], end_logits[window], context_mask, max_answer_len)
+            if best[item] is None or score > best[item][0]:
+                offsets = encoded["offset_mapping"][window]
+                best[item] = (score, int(offsets[start][0]), int(offsets[end][1]))
+
+        results = [
+            {"score": float(score), "start": start, "end": end, "answer": contexts[item][start:end]}
+            for item, (score, start, end) in enumerate(best)
+        ]
+        return results[0] if single else results
+
+
+def best_span(start_logits, end_logits, context_mask, max_answer_len):
+    """
+    Highest-probability (start, end) inside the context with
+    start <= end < start + max_answer_len, scored like the pipeline:
+    softmax over each side, then the product.
+    """
+    start_probs = softmax(np.where(context_mask, start_logits, -np.inf))
+    end_probs = softmax(np.where(context_mask, end_logits, -np.inf))
+    scores = np.tril(np.triu(np.outer(start_probs, end_probs)), max_answer_len - 1)
+    start, end = np.unravel_index(np.argmax(scores), scores.shape)
+    return scores[start, end], start, end
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max())
+    return exp / exp.sum()
@@ -3,6 +3,35 @@ import boto3
 from transformers import pipeline
 import requests
 
+# Every article goes into the context. The pipeline splits it into
+# overlapping windows of MAX_SEQ_LEN tokens (DOC_STRIDE tokens shared between
+# neighbours), scores WINDOW_BATCH_SIZE windows per forward pass and keeps
+# the best span across all of them.
+MAX_SEQ_LEN = 384
+DOC_STRIDE = 128
+WINDOW_BATCH_SIZE = 16
+
+def build_context(articles, limit=None):
+    """
+    One "title: description" line per article, skipping articles without a
+    description. limit keeps only the first articles.
+    """
+    context = ''
+    for article in articles[:limit]:
+        if article.get('description'):
+            context += f"{article['title']}: {article['description']}\n"
+    return context
+
+def answer(model, query, context):
+    return model(question=query,
+                 context=context,
+                 max_answer_len=100,    # Increase max answer length
+                 min_answer_len=20,    # Set a minimum answer length
+                 max_seq_len=MAX_SEQ_LEN,
+                 doc_stride=DOC_STRIDE,
+                 batch_size=WINDOW_BATCH_SIZE,
+                 )["answer"]
+
 def main():
     # Load summarization pipeline
     model = pipeline("question-answering", model="distilbert-base-uncased-distilled-squad")
@@ -20,18 +49,10 @@ def main():
     context_obj = s3.get_object(Bucket=bucket, Key=input_data['file_name'])
     context_data = json.loads(context_obj["Body"].read().decode("utf-8"))
 
-    context = ''
-    for i, article in enumerate(context_data['articles']):
-        context += f"{article['title']}: {article['description']}\n"
-        if i > 10: break
-    print(f"Context: {context}")
-
-    summary = model(question=query,   
-                    context=context,       
-                    max_answer_len=100,    # Increase max answer length  
-                    min_answer_len=20,    # Set a minimum answer length  
-                    max_seq_len=512,      # Maximum sequence length for processing (default is 384))  
-                    )["answer"]
+    context = build_context(context_data['articles'])
+    print(f"Context: {len(context_data['articles'])} articles, {len(context)} chars")
+
+    summary = answer(model, query, context)
 
     # Write output back to S3
     output_bucket = "outputbucket-123"
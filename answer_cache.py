@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+from context_builder import STOPWORDS, words
+
+
+def query_signature(text):
+    """
+    Reduce a query to its content words as a set of character trigrams, so
+    "elections" and "election" or small typos still land close together.
+    """
+    content = [
+        word for word in words(text)
+        if len(word) > 1 and word not in STOPWORDS
+    ]
+    trigrams = set()
+    for word in content:
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            trigrams.add(padded[i:i + 3])
+    return frozenset(trigrams)
+
+
+def similarity(a, b):
+    """
+    Jaccard similarity of two signatures. Two empty signatures are generic
+    queries ("india tech news") and count as identical.
+    """
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class AnswerCache:
+    """
+    Summaries keyed on (country, category), matched against new queries by
+    signature similarity. Entries live for ttl seconds, the news freshness
+    window, and each (country, category) keeps at most per_key entries.
+    """
+
+    def __init__(self, ttl=300, threshold=0.75, max_keys=256, per_key=16):
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_keys = max_keys
+        self.per_key = per_key
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+
+    def get(self, country, category, signature):
+        now = time.time()
+        with self._lock:
+            entries = self._entries.get((country, category))
+            if entries:
+                entries[:] = [entry for entry in entries if entry[0] > now]
+                best = None
+                best_score = self.threshold
+                for expires_at, cached_signature, answer in entries:
+                    score = similarity(signature, cached_signature)
+                    if score >= best_score:
+                        best, best_score = answer, score
+                if best is not None:
+                    self._entries.move_to_end((country, category))
+                    return best
+        return None
+
+    def set(self, country, category, signature, answer):
+        with self._lock:
+            entries = self._entries.setdefault((country, category), [])
+            entries.append((time.time() + self.ttl, signature, answer))
+            del entries[:-self.per_key]
+            self._entries.move_to_end((country, category))
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def record(self, hit, seconds):
+        """
+        Count a request and how long it took, split by hit and miss.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.hit_seconds += seconds
+            else:
+                self.misses += 1
+                self.miss_seconds += seconds
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "hit_ms": round(1000 * self.hit_seconds / self.hits, 1) if self.hits else None,
+            "miss_ms": round(1000 * self.miss_seconds / self.misses, 1) if self.misses else None,
+        }
@@ -0,0 +1,149 @@
+import math
+import sqlite3
+import threading
+from collections import Counter
+
+from context_builder import STOPWORDS, usable_articles, words
+
+# BM25 parameters: term-frequency saturation and document-length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2  # title terms count this many times towards term frequency
+
+
+def tokenize(text):
+    return [word for word in words(text) if len(word) > 1 and word not in STOPWORDS]
+
+
+class ArchiveIndex:
+    """
+    Inverted index over the articles archived under news/ in S3, in a local
+    SQLite file. Each article is stored once per URL; postings map term ids
+    to (doc id, term frequency) and are clustered by term, so a query reads
+    only the postings of its own terms. Queries are scored with BM25.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, title TEXT NOT NULL, "
+            "description TEXT NOT NULL, source TEXT, published_at TEXT, length INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS terms ("
+            "id INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE, df INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term_id INTEGER NOT NULL, doc_id INTEGER NOT NULL, tf INTEGER NOT NULL, "
+            "PRIMARY KEY (term_id, doc_id)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+        )
+        self._conn.commit()
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            docs, total_length = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs").fetchone()
+            terms = self._conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+        return {"docs": docs, "terms": terms, "avg_length": round(total_length / docs, 1) if docs else 0.0}
+
+    def document_frequency(self, term):
+        with self._lock:
+            row = self._conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+        return row[0] if row else 0
+
+    def add_articles(self, articles):
+        """
+        Index NewsAPI articles not seen before (by URL) in one transaction.
+        Returns how many were added.
+        """
+        added = 0
+        with self._lock:
+            for article in articles:
+                url = article.get("url")
+                usable = usable_articles([article])
+                if not url or not usable:
+                    continue
+                title, description = usable[0]
+                tf = Counter(tokenize(title) * TITLE_WEIGHT + tokenize(description))
+                if not tf:
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO docs (url, title, description, source, published_at, length) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, title, description, (article.get("source") or {}).get("name"),
+                     article.get("publishedAt"), sum(tf.values())),
+                )
+                if not cursor.rowcount:
+                    continue  # already indexed from an earlier archive
+                doc_id = cursor.lastrowid
+                for term, count in tf.items():
+                    self._conn.execute(
+                        "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                        (term,),
+                    )
+                    term_id = self._conn.execute("SELECT id FROM terms WHERE term = ?", (term,)).fetchone()[0]
+                    self._conn.execute(
+                        "INSERT INTO postings (term_id, doc_id, tf) VALUES (?, ?, ?)", (term_id, doc_id, count),
+                    )
+                added += 1
+            self._conn.commit()
+        return added
+
+    def search(self, query, k=10, min_match=0.0):
+        """
+        The k best BM25 matches for the query as [(score, article)], best
+        first. Only articles containing at least min_match of the query's
+        terms count, so a query sharing one common word with an article
+        ("how are you doing") doesn't match it. Empty when none qualify.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        needed = max(1, math.ceil(min_match * len(terms)))
+        with self._lock:
+            docs, total_length = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs").fetchone()
+            if not docs:
+                return []
+            avg_length = total_length / docs
+            marks = ",".join("?" * len(terms))
+            rows = self._conn.execute(
+                f"SELECT t.df, p.doc_id, p.tf, d.length FROM terms t "
+                f"JOIN postings p ON p.term_id = t.id JOIN docs d ON d.id = p.doc_id "
+                f"WHERE t.term IN ({marks})",
+                tuple(terms),
+            ).fetchall()
+            scores = Counter()
+            matched = Counter()
+            for df, doc_id, tf, length in rows:
+                idf = math.log(1 + (docs - df + 0.5) / (df + 0.5))
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                matched[doc_id] += 1
+            top = Counter({doc_id: score for doc_id, score in scores.items() if matched[doc_id] >= needed}).most_common(k)
+            if not top:
+                return []
+            found = {
+                row[0]: row[1:] for row in self._conn.execute(
+                    f"SELECT id, url, title, description, source, published_at FROM docs "
+                    f"WHERE id IN ({','.join('?' * len(top))})",
+                    tuple(doc_id for doc_id, _ in top),
+                )
+            }
+        results = []
+        for doc_id, score in top:
+            url, title, description, source, published_at = found[doc_id]
+            results.append((round(score, 4), {
+                "title": title, "description": description, "url": url,
+                "publishedAt": published_at, "source": {"name": source},
+            }))
+        return results
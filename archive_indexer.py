@@ -0,0 +1,94 @@
+import datetime
+import json
+import logging
+import os
+import re
+import time
+
+import aws_clients
+import hquery
+from archive_index import ArchiveIndex
+
+_LOG = logging.getLogger()
+
+ARCHIVE_PREFIX = "news/"
+ARCHIVE_KEY_PATTERN = re.compile(r"^news/news_(\d{4}-\d{2}-\d{2}-\d{2}-\d{2}-\d{2})\.json$")
+ARCHIVE_TIME_FORMAT = "%Y-%m-%d-%H-%M-%S"
+# Archives land a little out of order (background writes, several containers),
+# so each run looks back this far before the newest key it has indexed
+ARCHIVE_LAG = int(os.environ.get("ARCHIVE_LAG", "300"))  # seconds
+# Files one run may read, so a long backlog is worked off over several runs
+ARCHIVE_MAX_FILES = int(os.environ.get("ARCHIVE_MAX_FILES", "2000"))
+
+
+def start_after(last_key):
+    """
+    The listing start for this run: ARCHIVE_LAG seconds before the newest
+    key indexed so far. Files seen twice cost a GET; their articles are
+    already in the index by URL.
+    """
+    match = ARCHIVE_KEY_PATTERN.match(last_key or "")
+    if not match:
+        return ""
+    newest = datetime.datetime.strptime(match.group(1), ARCHIVE_TIME_FORMAT)
+    return f"{ARCHIVE_PREFIX}news_{(newest - datetime.timedelta(seconds=ARCHIVE_LAG)).strftime(ARCHIVE_TIME_FORMAT)}"
+
+
+def archive_keys(bucket, after, limit):
+    """
+    Archive keys after the given key, oldest first (the timestamp in the
+    name sorts the same way), at most limit of them.
+    """
+    paginator = aws_clients.client("s3").get_paginator("list_objects_v2")
+    keys = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=ARCHIVE_PREFIX, StartAfter=after):
+        for item in page.get("Contents", []):
+            if ARCHIVE_KEY_PATTERN.match(item["Key"]):
+                keys.append(item["Key"])
+                if len(keys) == limit:
+                    return keys
+    return keys
+
+
+def index_archives(index, bucket=hquery.INPUT_BUCKET, max_files=ARCHIVE_MAX_FILES):
+    """
+    Ingest the archive files written since the last run into the index and
+    return a report of what was read and added.
+    """
+    started = time.time()
+    last_key = index.get_meta("last_key", "")
+    s3 = aws_clients.client("s3")
+    files = added = failed = 0
+    for key in archive_keys(bucket, start_after(last_key), max_files):
+        try:
+            news_data = json.loads(s3.get_object(Bucket=bucket, Key=key)["Body"].read())
+        except Exception as e:
+            _LOG.error(f"Reading archive {key} failed: {e}")
+            failed += 1
+            continue
+        added += index.add_articles(news_data.get("articles", []))
+        files += 1
+        if key > last_key:
+            last_key = key
+            index.set_meta("last_key", last_key)
+    report = {
+        "files": files,
+        "failed": failed,
+        "added": added,
+        "last_key": last_key,
+        "seconds": round(time.time() - started, 2),
+        **index.stats(),
+    }
+    print(json.dumps({"archive_index": report}))
+    return report
+
+
+def lambda_handler(event, context):
+    """
+    Entry point for the scheduled (EventBridge) indexing run.
+    """
+    return index_archives(ArchiveIndex(hquery.ARCHIVE_INDEX_DB))
+
+
+if __name__ == "__main__":
+    index_archives(ArchiveIndex(hquery.ARCHIVE_INDEX_DB or "archive_index.sqlite3"))
@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from context_builder import usable_articles
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"  # 22M parameters, 384 dims
+
+
+def article_text(title, description):
+    return f"{title}. {description}"
+
+
+class Embedder:
+    """
+    Small sentence-embedding model run on the CPU. Loaded on first use so a
+    container that never builds an index doesn't pay for it. Returns
+    L2-normalized float32 rows, so a dot product is the cosine similarity.
+    """
+
+    def __init__(self, model_name=DEFAULT_EMBEDDING_MODEL, batch_size=32):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name, device="cpu")
+            return self._model
+
+    @property
+    def dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts):
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        vectors = self.model.encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True,
+        )
+        return vectors.astype(np.float32, copy=False)
+
+
+class ArticleIndex:
+    """
+    Embeddings of every article fetched so far, one row per URL in a NumPy
+    matrix that grows by doubling. Upserts only embed articles that are new
+    or whose text changed; search is a matrix-vector product over the rows,
+    optionally restricted to a set of URLs (the articles of one response).
+    """
+
+    def __init__(self, embedder, capacity=1024, max_articles=50000):
+        self.embedder = embedder
+        self.max_articles = max_articles
+        self.matrix = None
+        self.capacity = capacity
+        self.size = 0
+        self.urls = []
+        self.texts = []
+        self.rows = {}  # url -> row
+        self.embedded = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, needed):
+        if self.matrix is None:
+            self.capacity = max(self.capacity, needed)
+            self.matrix = np.zeros((self.capacity, self.embedder.dimension), dtype=np.float32)
+            return
+        if needed <= self.capacity:
+            return
+        while self.capacity < needed:
+            self.capacity *= 2
+        matrix = np.zeros((self.capacity, self.matrix.shape[1]), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        self.matrix = matrix
+
+    def upsert(self, articles):
+        """
+        Add NewsAPI articles, keyed on URL. Returns how many were embedded.
+        """
+        pending = {}
+        with self._lock:
+            for article in articles:
+                url = article.get("url")
+                usable = usable_articles([article])
+                if not url or not usable:
+                    continue
+                text = article_text(*usable[0])
+                row = self.rows.get(url)
+                if (row is None or self.texts[row] != text) and url not in pending:
+                    pending[url] = text
+        if not pending:
+            return 0
+        # Embed outside the lock; searches keep running on the rows already there
+        vectors = self.embedder.embed(list(pending.values()))
+        with self._lock:
+            overflow = self.size + sum(url not in self.rows for url in pending) - self.max_articles
+            if overflow > 0 and self.size:
+                self._evict(overflow)
+            self._grow(self.size + sum(url not in self.rows for url in pending))
+            for (url, text), vector in zip(pending.items(), vectors):
+                row = self.rows.get(url)
+                if row is None:
+                    row = self.size
+                    self.rows[url] = row
+                    self.urls.append(url)
+                    self.texts.append(text)
+                    self.size += 1
+                self.texts[row] = text
+                self.matrix[row] = vector
+            self.embedded += len(pending)
+        return len(pending)
+
+    def _evict(self, count):
+        """
+        Drop the count oldest rows. Caller holds the lock.
+        """
+        count = min(count, self.size)
+        keep = self.size - count
+        self.matrix[:keep] = self.matrix[count:self.size]
+        self.urls = self.urls[count:]
+        self.texts = self.texts[count:]
+        self.rows = {url: row for row, url in enumerate(self.urls)}
+        self.size = keep
+
+    def search(self, query, k=5, urls=None):
+        """
+        The k URLs most similar to the query as [(url, cosine)], best first.
+        With urls, only those articles are candidates.
+        """
+        vector = self.embedder.embed([query])[0]
+        with self._lock:
+            if self.size == 0:
+                return []
+            if urls is None:
+                rows = np.arange(self.size)
+            else:
+                rows = np.fromiter((self.rows[url] for url in urls if url in self.rows), dtype=np.int64)
+                if not len(rows):
+                    return []
+            scores = self.matrix[rows] @ vector
+            candidate_urls = [self.urls[row] for row in rows]
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(candidate_urls[i], float(scores[i])) for i in top]
+
+    def select(self, query, articles, k=5):
+        """
+        The k of articles most relevant to the query, embedding any the index
+        hasn't seen. Articles without a URL are kept after the ranked ones.
+        """
+        self.upsert(articles)
+        by_url = {}
+        unkeyed = []
+        for article in articles:
+            if article.get("url"):
+                by_url.setdefault(article["url"], article)
+            else:
+                unkeyed.append(article)
+        ranked = [by_url[url] for url, _ in self.search(query, k, urls=list(by_url))]
+        return (ranked + unkeyed)[:k]
+
+    def save(self, directory):
+        """
+        Write the matrix and its URLs/texts to directory, for the next cold start.
+        """
+        os.makedirs(directory, exist_ok=True)
+        # Copy under the lock and write outside it, so searches don't wait on the disk
+        with self._lock:
+            matrix = self.matrix[:self.size].copy() if self.matrix is not None else np.zeros((0, 0), dtype=np.float32)
+            meta = {"model": self.embedder.model_name, "urls": list(self.urls), "texts": list(self.texts)}
+        np.save(os.path.join(directory, "embeddings.tmp.npy"), matrix)
+        with open(os.path.join(directory, "articles.tmp.json"), "w") as f:
+            json.dump(meta, f)
+        os.replace(os.path.join(directory, "embeddings.tmp.npy"), os.path.join(directory, "embeddings.npy"))
+        os.replace(os.path.join(directory, "articles.tmp.json"), os.path.join(directory, "articles.json"))
+
+    def load(self, directory):
+        """
+        Restore what save wrote. Skipped (returns False) if there is nothing
+        there or it was built with another model.
+        """
+        meta_path = os.path.join(directory, "articles.json")
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta["model"] != self.embedder.model_name or not meta["urls"]:
+            return False
+        matrix = np.load(os.path.join(directory, "embeddings.npy"))
+        with self._lock:
+            self.capacity = max(self.capacity, len(meta["urls"]))
+            self.matrix = np.zeros((self.capacity, matrix.shape[1]), dtype=np.float32)
+            self.matrix[:len(matrix)] = matrix
+            self.urls = meta["urls"]
+            self.texts = meta["texts"]
+            self.rows = {url: row for row, url in enumerate(self.urls)}
+            self.size = len(self.urls)
+        return True
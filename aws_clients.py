@@ -0,0 +1,103 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "20"))
+AWS_MAX_ATTEMPTS = int(os.environ.get("AWS_MAX_ATTEMPTS", "3"))
+AWS_CONNECT_TIMEOUT = float(os.environ.get("AWS_CONNECT_TIMEOUT", "3"))
+AWS_READ_TIMEOUT = float(os.environ.get("AWS_READ_TIMEOUT", "60"))  # Bedrock generations are slow
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+    retries={"mode": "adaptive", "max_attempts": AWS_MAX_ATTEMPTS},
+    connect_timeout=AWS_CONNECT_TIMEOUT,
+    read_timeout=AWS_READ_TIMEOUT,
+    tcp_keepalive=True,
+)
+
+# boto3's default session is not thread-safe, so the registry owns its own
+_session = None
+_clients = {}
+# Resources (and Table handles) are not thread-safe either, unlike clients,
+# so each thread gets its own; reset() bumps the generation to drop them all
+_local = threading.local()
+_generation = 0
+_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+
+def client(service_name, region_name=None):
+    """
+    Return a cached boto3 client for the service, creating it on first use.
+    Clients are kept for the container's lifetime so warm invocations skip
+    client construction and reuse the client's connection pool.
+    """
+    key = (service_name, region_name or AWS_REGION)
+    found = _clients.get(key)
+    if found is None:
+        with _lock:
+            found = _clients.get(key)
+            if found is None:
+                found = get_session().client(service_name, region_name=key[1], config=CLIENT_CONFIG)
+                _clients[key] = found
+    return found
+
+
+def _thread_cache():
+    """
+    This thread's resource cache, emptied if reset() ran since it was built.
+    """
+    if getattr(_local, "generation", None) != _generation:
+        _local.generation = _generation
+        _local.resources = {}
+        _local.tables = {}
+    return _local
+
+
+def resource(service_name, region_name=None):
+    """
+    Return a boto3 resource, e.g. for DynamoDB tables, cached per thread
+    because resources must not be shared between threads.
+    """
+    key = (service_name, region_name or AWS_REGION)
+    cache = _thread_cache()
+    found = cache.resources.get(key)
+    if found is None:
+        with _lock:
+            found = get_session().resource(service_name, region_name=key[1], config=CLIENT_CONFIG)
+        cache.resources[key] = found
+    return found
+
+
+def dynamodb_table(table_name, region_name=None):
+    """
+    Return this thread's cached DynamoDB Table handle.
+    """
+    key = (table_name, region_name or AWS_REGION)
+    cache = _thread_cache()
+    found = cache.tables.get(key)
+    if found is None:
+        found = resource("dynamodb", region_name).Table(table_name)
+        cache.tables[key] = found
+    return found
+
+
+def reset():
+    """
+    Drop every cached client, forcing the next call to build fresh ones.
+    Used by the benchmarks to simulate a cold start.
+    """
+    global _session, _generation
+    with _lock:
+        _session = None
+        _clients.clear()
+        _generation += 1
@@ -0,0 +1,185 @@
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from moto import mock_aws
+
+from fake_bedrock import FakeBedrockRuntime, install_fake_bedrock
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "tor", "vex", "sal", "quin", "dra", "mop", "zu", "bel", "nar", "ost", "pi", "gral"]
+START = datetime.datetime(2024, 12, 1)
+# Everyday words real headlines use now and then ("How you can...")
+EVERYDAY_WORDS = ["how", "you", "doing", "good", "morning", "thanks", "can", "hello", "there", "help"]
+SMALL_TALK = ["how are you doing", "hello there", "good morning", "thanks for the help", "what can you do"]
+
+
+def vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))))
+    return sorted(words)
+
+
+def make_archives(rng, words, files, per_file, repeat_share):
+    """
+    files archive responses of per_file articles; repeat_share of each
+    response are stories already seen in earlier ones, as successive
+    NewsAPI calls for the same topic return.
+    """
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    seen = []
+    archives = []
+    for i in range(files):
+        articles = []
+        for _ in range(per_file):
+            if seen and rng.random() < repeat_share:
+                articles.append(rng.choice(seen))
+                continue
+            n = len(seen)
+            title = rng.choices(words, weights=weights, k=8)
+            if rng.random() < 0.2:
+                title.insert(rng.randrange(len(title)), rng.choice(EVERYDAY_WORDS))
+            article = {
+                "source": {"name": "Mock Wire"},
+                "title": " ".join(title).capitalize(),
+                "description": " ".join(rng.choices(words, weights=weights, k=24)).capitalize() + ".",
+                "url": f"https://example.com/archive/{n}",
+                "publishedAt": (START + datetime.timedelta(minutes=i)).isoformat() + "Z",
+            }
+            seen.append(article)
+            articles.append(article)
+        key = f"news/news_{(START + datetime.timedelta(minutes=i)).strftime('%Y-%m-%d-%H-%M-%S')}.json"
+        archives.append((key, {"status": "ok", "totalResults": len(articles), "articles": articles}))
+    return archives, seen
+
+
+def known_item_queries(rng, articles, count, index):
+    """
+    Queries made of three of an article's rarer title words, with the
+    article as the one right answer.
+    """
+    queries = []
+    for article in rng.sample(articles, count):
+        terms = set(article["title"].lower().split()) - set(EVERYDAY_WORDS)
+        terms = sorted(terms, key=lambda term: index.document_frequency(term))
+        queries.append((" ".join(terms[:3]), article["url"]))
+    return queries
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental archive indexing and BM25 search over archived news.")
+    parser.add_argument("--files", type=int, default=600, help="archive files already in S3")
+    parser.add_argument("--new-files", type=int, default=30, help="archive files written before the second run")
+    parser.add_argument("--per-file", type=int, default=20)
+    parser.add_argument("--repeat-share", type=float, default=0.5)
+    parser.add_argument("--vocabulary", type=int, default=4000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="archive-index-")
+    os.environ["ARCHIVE_INDEX_DB"] = os.path.join(directory, "archive_index.sqlite3")
+    import archive_indexer
+    import aws_clients
+    import hquery
+    import tracing
+    from archive_index import ArchiveIndex
+
+    logging.getLogger().setLevel(logging.WARNING)
+    tracing.TRACE_SAMPLE_RATE = 0
+    tracing.TRACE_SLOW_MS = float("inf")
+    rng = random.Random(0)
+    archives, articles = make_archives(
+        rng, vocabulary(rng, args.vocabulary), args.files + args.new_files, args.per_file, args.repeat_share,
+    )
+
+    with mock_aws():
+        aws_clients.reset()
+        s3 = aws_clients.client("s3")
+        s3.create_bucket(Bucket=hquery.INPUT_BUCKET)
+        raw_bytes = 0
+        for key, news_data in archives[:args.files]:
+            body = json.dumps(news_data)
+            raw_bytes += len(body)
+            s3.put_object(Bucket=hquery.INPUT_BUCKET, Key=key, Body=body)
+        install_fake_bedrock(FakeBedrockRuntime(scale=0))
+        index = ArchiveIndex(hquery.ARCHIVE_INDEX_DB)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            first = archive_indexer.index_archives(index)
+            for key, news_data in archives[args.files:]:
+                s3.put_object(Bucket=hquery.INPUT_BUCKET, Key=key, Body=json.dumps(news_data))
+            second = archive_indexer.index_archives(index)
+
+        queries = known_item_queries(rng, articles, args.queries, index)
+        search_ms = []
+        reciprocal_ranks = []
+        for query, url in queries:
+            start = time.perf_counter()
+            results = index.search(query, hquery.ARCHIVE_RESULTS, hquery.ARCHIVE_MIN_MATCH)
+            search_ms.append((time.perf_counter() - start) * 1000)
+            urls = [article["url"] for _, article in results]
+            reciprocal_ranks.append(1 / (urls.index(url) + 1) if url in urls else 0.0)
+
+        # Through the handler: these queries name no country or category
+        statuses = {}
+        archive_ms = []
+        collect = lambda record: archive_ms.append(record.get("archive_search_ms", 0))
+        tracing.listeners.append(collect)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for enabled in (False, True):
+                hquery.archive_index = index if enabled else None
+                codes = [
+                    hquery.lambda_handler({"queryStringParameters": {"q": query}}, None)["statusCode"]
+                    for query, _ in queries[:50]
+                ]
+                statuses[enabled] = {code: codes.count(code) for code in sorted(set(codes))}
+            # Small talk shares a word or two with some titles; the match
+            # floor should turn it away rather than answer with those articles
+            small_talk = {}
+            min_match = hquery.ARCHIVE_MIN_MATCH
+            for floor in (0.0, min_match):
+                hquery.ARCHIVE_MIN_MATCH = floor
+                codes = [
+                    hquery.lambda_handler({"queryStringParameters": {"q": query}}, None)["statusCode"]
+                    for query in SMALL_TALK
+                ]
+                small_talk[floor] = {code: codes.count(code) for code in sorted(set(codes))}
+            hquery.ARCHIVE_MIN_MATCH = min_match
+        tracing.listeners.remove(collect)
+        archive_ms = archive_ms[50:100]
+
+    index_bytes = os.path.getsize(hquery.ARCHIVE_INDEX_DB)
+    print(f"run 1: {first['files']} files, {first['added']} articles added in {first['seconds']} s "
+          f"({first['docs']} unique of {args.files * args.per_file} archived)")
+    print(f"run 2: {second['files']} files read ({args.new_files} new), {second['added']} articles added in {second['seconds']} s")
+    print(f"index {index_bytes / 2**20:.1f} MiB for {raw_bytes / 2**20:.1f} MiB of archive JSON, "
+          f"{second['docs']} docs, {second['terms']} terms")
+    print(f"search: p50 {statistics.median(search_ms):.2f} ms  p95 {percentile(search_ms, 0.95):.2f} ms  "
+          f"MRR@{hquery.ARCHIVE_RESULTS} {statistics.mean(reciprocal_ranks):.3f}  "
+          f"found {sum(rank > 0 for rank in reciprocal_ranks)}/{len(queries)}")
+    print(f"no country/category queries: without index {statuses[False]}, with index {statuses[True]}, "
+          f"archive_search p50 {statistics.median(archive_ms):.2f} ms")
+    for floor, codes in small_talk.items():
+        print(f"small talk ({len(SMALL_TALK)} queries), min match {floor:.1f}: {codes}")
+
+
+if __name__ == "__main__":
+    main()
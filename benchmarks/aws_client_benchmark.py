@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import boto3
+from moto import mock_aws
+
+import aws_clients
+
+BUCKET = "inputbucket-123"
+BODY = json.dumps({"status": "ok", "totalResults": 1, "articles": [{"title": "t", "description": "d"}]})
+
+
+def per_call_client(i):
+    """
+    The old pattern: build a fresh client inside every handler call.
+    """
+    s3 = boto3.client("s3")
+    s3.put_object(Bucket=BUCKET, Key=f"news/{i}.json", Body=BODY)
+
+
+def registry_client(i):
+    s3 = aws_clients.client("s3")
+    s3.put_object(Bucket=BUCKET, Key=f"news/{i}.json", Body=BODY)
+
+
+def measure(fn, calls):
+    latencies = []
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name, latencies):
+    print(f"{name:<22} first {latencies[0] * 1000:7.2f} ms  "
+          f"warm median {statistics.median(latencies[1:]) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call boto3 clients vs the cached client registry.")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with mock_aws():
+        boto3.client("s3").create_bucket(Bucket=BUCKET)
+
+        start = time.perf_counter()
+        aws_clients.reset()
+        aws_clients.client("s3")
+        print(f"Cold client construction: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        report("per-call boto3.client", measure(per_call_client, args.calls))
+        aws_clients.reset()
+        report("aws_clients registry", measure(registry_client, args.calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "SageMaker_attempt"))
+
+from transformers import pipeline
+
+import summarization
+
+QUESTION = "Which company announced a recall of its electric scooters?"
+NEEDLE = {"title": "Scooter recall", "description": "Voltride announced a recall of its electric scooters after battery fires in three cities."}
+
+
+def make_articles(count):
+    """
+    count filler articles with the one that answers QUESTION placed last,
+    where the old 12-article cap can't see it.
+    """
+    articles = [
+        {"title": f"Market update {i}",
+         "description": f"Shares in sector {i} moved after quarterly results, with analysts pointing to demand, "
+                        f"supply costs and currency swings as the main drivers for the period."}
+        for i in range(count - 1)
+    ]
+    return articles + [NEEDLE]
+
+
+def legacy(model, articles):
+    # The old processing job: first 12 articles, one window per forward pass
+    return model(question=QUESTION, context=summarization.build_context(articles, limit=12),
+                 max_answer_len=100, min_answer_len=20, max_seq_len=512)["answer"]
+
+
+def chunked(window_batch_size):
+    def run(model, articles):
+        summarization.WINDOW_BATCH_SIZE = window_batch_size
+        return summarization.answer(model, QUESTION, summarization.build_context(articles))
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QA throughput versus number of articles: capped context vs batched windows.")
+    parser.add_argument("--model", default="distilbert-base-uncased-distilled-squad")
+    parser.add_argument("--articles", default="12,25,50,100")
+    parser.add_argument("--window-batch", type=int, default=summarization.WINDOW_BATCH_SIZE)
+    args = parser.parse_args()
+
+    model = pipeline("question-answering", model=args.model, device="cpu")
+    windows_of = lambda articles: len(model.tokenizer(
+        QUESTION, summarization.build_context(articles), truncation="only_second",
+        max_length=summarization.MAX_SEQ_LEN, stride=summarization.DOC_STRIDE, return_overflowing_tokens=True,
+    )["input_ids"])
+    runs = (
+        ("first 12 only", legacy),
+        ("all, 1 window/pass", chunked(1)),
+        (f"all, {args.window_batch} windows/pass", chunked(args.window_batch)),
+    )
+    model(question=QUESTION, context=NEEDLE["description"])  # warm-up
+    for count in (int(n) for n in args.articles.split(",")):
+        articles = make_articles(count)
+        print(f"{count} articles, {windows_of(articles)} windows")
+        for name, run in runs:
+            start = time.perf_counter()
+            answer = run(model, articles)
+            seconds = time.perf_counter() - start
+            found = "Voltride" in answer
+            print(f"  {name:<22} {seconds:6.2f} s  {count / seconds:7.1f} articles/s  answer found: {found}")
+
+
+if __name__ == "__main__":
+    main()
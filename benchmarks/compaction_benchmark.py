@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "helpers"))
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from moto import mock_aws
+
+import aws_clients
+import Srinivas_code
+from conversation_benchmark import ask_event, legacy_turns
+from dynamodb_delete_benchmark import create_table
+from fake_bedrock import FakeBedrockRuntime, install_fake_bedrock
+
+
+def session_turns(fake, session_id, turns, page_every):
+    """
+    Run a session through the handler. Between turns the compaction worker
+    is drained, standing in for the user's think time.
+    """
+    results = {}
+    for turn in range(1, turns + 1):
+        start = time.perf_counter()
+        Srinivas_code.lambda_handler(ask_event(session_id, turn, page_every), None)
+        elapsed = time.perf_counter() - start
+        # The turn's own call is the last one made on this thread
+        me = threading.current_thread().name
+        _, tokens, modeled = [entry for entry in fake.log if entry[0] == me][-1]
+        results[turn] = (tokens, elapsed + modeled * (1 - fake.scale))
+        Srinivas_code.compaction_executor.submit(lambda: None).result()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size and latency over long sessions with and without compaction.")
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--page-every", type=int, default=25)
+    parser.add_argument("--every", type=int, default=10, help="print one row per this many turns")
+    parser.add_argument("--scale", type=float, default=0.01, help="fraction of modeled Bedrock latency to sleep")
+    args = parser.parse_args()
+
+    with mock_aws():
+        aws_clients.reset()
+        create_table()
+        fake = install_fake_bedrock(FakeBedrockRuntime(scale=args.scale))
+        legacy = legacy_turns(fake, args.turns, args.page_every)
+
+        compact_after = Srinivas_code.COMPACT_AFTER_TOKENS
+        Srinivas_code.COMPACT_AFTER_TOKENS = float("inf")
+        window = session_turns(fake, "window-only", args.turns, args.page_every)
+        Srinivas_code.COMPACT_AFTER_TOKENS = compact_after
+        calls_before = len(fake.log)
+        compacted = session_turns(fake, "compacted", args.turns, args.page_every)
+        compactions = len(fake.log) - calls_before - args.turns
+
+    print(f"{'turn':>5} {'legacy':>16} {'window only':>18} {'window + memory':>18}")
+    for turn in range(args.every, args.turns + 1, args.every):
+        row = [f"{turn:>5}"]
+        for results in (legacy, window, compacted):
+            tokens, seconds = results[turn]
+            row.append(f"{tokens:>8d} tok {seconds:5.2f} s")
+        print("  ".join(row))
+    print(f"Compactions run off the request path: {compactions}")
+    memory = Srinivas_code.conversations.get("compacted").memory
+    print(f"Final memory block: {len(memory)} chars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import hquery
+from context_builder import estimate_tokens
+from fake_bedrock import FakeBedrockRuntime, install_fake_bedrock
+
+OUTLETS = ["Reuters", "AP News", "BBC News", "CNN", "The Hindu", "Bloomberg", "NDTV", "Al Jazeera"]
+TOPICS = ["election results", "stock market rally", "chip export rules", "cricket final",
+          "heatwave warning", "central bank rates", "film festival awards", "vaccine rollout",
+          "AI regulation bill", "port strike", "rail accident", "startup funding round"]
+
+
+def synthetic_payload(rng, articles=100):
+    """
+    An /everything-sized payload with syndicated duplicates and null fields,
+    shaped like what NewsAPI actually returns.
+    """
+    items = []
+    for i in range(articles):
+        topic = rng.choice(TOPICS)
+        outlet = rng.choice(OUTLETS)
+        if rng.random() < 0.08:
+            items.append({"title": "[Removed]", "description": "[Removed]"})
+            continue
+        description = None if rng.random() < 0.1 else (
+            f"Officials said the {topic} would have wide effects. " * rng.randint(1, 4)).strip()
+        items.append({"title": f"{topic.capitalize()} update {i % 15} - {outlet}", "description": description})
+    return {"status": "ok", "totalResults": len(items), "articles": items}
+
+
+def legacy_prompt(query, news_data):
+    context = ""
+    for article in news_data["articles"]:
+        context += f"{article['title']}: {article['description']}\n"
+    p = f"query: {query} Answer in 150 words. "
+    if context:
+        p += f"context: {context}"
+    return [{"role": "user", "content": [{"text": p}]}]
+
+
+def load_payloads(path, count, rng):
+    """
+    Archived news_*.json files from S3 if a directory is given, otherwise
+    synthetic ones.
+    """
+    if path:
+        payloads = []
+        for file_name in sorted(glob.glob(os.path.join(path, "*.json"))):
+            with open(file_name) as f:
+                payloads.append(json.load(f))
+        return payloads
+    return [synthetic_payload(rng) for _ in range(count)]
+
+
+def measure(build, payloads, queries, scale):
+    tokens = []
+    build_times = []
+    latencies = []
+    bedrock = hquery.aws_clients.client("bedrock-runtime", region_name="us-east-1")
+    for news_data, query in zip(payloads, queries):
+        start = time.perf_counter()
+        messages = build(query, news_data)
+        built = time.perf_counter()
+        bedrock.converse(modelId=hquery.MODEL_ID, messages=messages)
+        done = time.perf_counter()
+        tokens.append(estimate_tokens(messages[0]["content"][0]["text"]))
+        build_times.append(built - start)
+        # Only the fake Bedrock sleep is scaled down; scale it back up
+        latencies.append((built - start) + (done - built) / scale)
+    return tokens, build_times, latencies
+
+
+def report(name, tokens, build_times, latencies):
+    print(f"{name:<16} prompt tokens mean {statistics.mean(tokens):7.0f} max {max(tokens):6d}  "
+          f"build {statistics.mean(build_times) * 1e3:6.2f} ms  "
+          f"end-to-end p50 {statistics.median(latencies):6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size and latency with and without the context builder.")
+    parser.add_argument("--payloads", help="directory of recorded NewsAPI JSON responses")
+    parser.add_argument("--count", type=int, default=30)
+    parser.add_argument("--budget", type=int, default=hquery.CONTEXT_TOKEN_BUDGET)
+    parser.add_argument("--scale", type=float, default=0.01, help="fraction of modeled Bedrock latency to actually sleep")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    payloads = load_payloads(args.payloads, args.count, rng)
+    queries = [f"What is the latest on the {rng.choice(TOPICS)}?" for _ in payloads]
+    install_fake_bedrock(FakeBedrockRuntime(scale=args.scale))
+    hquery.CONTEXT_TOKEN_BUDGET = args.budget
+
+    report("legacy +=", *measure(legacy_prompt, payloads, queries, args.scale))
+    report("context builder", *measure(hquery.build_summary_messages, payloads, queries, args.scale))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "helpers"))
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from moto import mock_aws
+
+import aws_clients
+import Srinivas_code
+from context_builder import estimate_tokens
+from dynamodb_delete_benchmark import create_table
+from fake_bedrock import FakeBedrockRuntime, install_fake_bedrock
+
+PAGE_CONTENT = "Paragraph of the news article the user is reading. " * 300
+REPORT_TURNS = (1, 10, 50)
+
+
+def ask_event(session_id, turn, page_every):
+    page = turn // page_every
+    return {"body": json.dumps({
+        "action": "ask",
+        "session_id": session_id,
+        "imageContext": "",
+        "pageContent": PAGE_CONTENT,
+        "pageURL": f"https://example.com/article/{page}",
+        "prompt": f"Question {turn}: what does the article say about point {turn}?",
+    })}
+
+
+def legacy_turns(fake, turns, page_every):
+    """
+    Replay the old global prompt string: page content appended on every
+    page change, every question and answer appended forever. Only the
+    modeled Bedrock time is counted.
+    """
+    p = ""
+    current_page = None
+    results = {}
+    for turn in range(1, turns + 1):
+        page = turn // page_every
+        if page != current_page:
+            p += PAGE_CONTENT
+            current_page = page
+        p += f"Question {turn}: what does the article say about point {turn}?"
+        response = fake.converse(modelId=Srinivas_code.MODEL_ID, messages=[{"role": "user", "content": [{"text": p}]}])
+        results[turn] = (estimate_tokens(p), fake.last_modeled)
+        p += response["output"]["message"]["content"][0]["text"]
+    return results
+
+
+def store_turns(fake, turns, page_every):
+    results = {}
+    for turn in range(1, turns + 1):
+        before = fake.input_tokens
+        start = time.perf_counter()
+        Srinivas_code.lambda_handler(ask_event("bench-session", turn, page_every), None)
+        elapsed = time.perf_counter() - start
+        # Swap the scaled-down sleep for the latency it models
+        elapsed += fake.last_modeled * (1 - fake.scale)
+        results[turn] = (fake.input_tokens - before, elapsed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turn latency: global prompt string vs per-session store.")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--page-every", type=int, default=10, help="turns before the user opens a new page")
+    parser.add_argument("--scale", type=float, default=0.01, help="fraction of modeled Bedrock latency to sleep")
+    args = parser.parse_args()
+
+    with mock_aws():
+        aws_clients.reset()
+        create_table()
+        fake = install_fake_bedrock(FakeBedrockRuntime(scale=args.scale))
+        legacy = legacy_turns(fake, args.turns, args.page_every)
+        store = store_turns(fake, args.turns, args.page_every)
+
+    for turn in REPORT_TURNS:
+        if turn > args.turns:
+            continue
+        legacy_tokens, legacy_seconds = legacy[turn]
+        store_tokens, store_seconds = store[turn]
+        print(f"turn {turn:>3}  legacy {legacy_tokens:7d} tokens {legacy_seconds:6.2f} s   "
+              f"store {store_tokens:7d} tokens {store_seconds:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "helpers"))
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from boto3.dynamodb.conditions import Key
+from moto import mock_aws
+
+import aws_clients
+import Srinivas_code
+
+TARGET_SESSION = "target-session"
+
+
+def create_table():
+    dynamodb = aws_clients.resource("dynamodb", region_name="us-east-1")
+    return dynamodb.create_table(
+        TableName=Srinivas_code.TABLE_NAME,
+        KeySchema=[
+            {"AttributeName": "sessionId", "KeyType": "HASH"},
+            {"AttributeName": "timestamp", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "sessionId", "AttributeType": "S"},
+            {"AttributeName": "timestamp", "AttributeType": "N"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+def fill(table, size, session_items):
+    """
+    size items spread over many sessions, session_items of them in the
+    target session, each carrying a chunk of page content like real turns.
+    """
+    page = "x" * 500
+    with table.batch_writer() as batch:
+        for i in range(size):
+            session = TARGET_SESSION if i < session_items else f"session-{i % 5000}"
+            batch.put_item(Item={
+                "sessionId": session, "timestamp": i,
+                "question": "q", "answer": "a", "pageContent": page,
+            })
+
+
+def scan_keys(table, session_id, paginate):
+    """
+    The old lookup: a filtered Scan. Without pagination it only sees the
+    first 1 MB of the table.
+    """
+    args = {"FilterExpression": Key("sessionId").eq(session_id)}
+    items = []
+    while True:
+        response = table.scan(**args)
+        items.extend(response["Items"])
+        if not paginate or "LastEvaluatedKey" not in response:
+            return items
+        args["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def query_keys(table, session_id):
+    args = {
+        "KeyConditionExpression": Key("sessionId").eq(session_id),
+        "ProjectionExpression": "sessionId, #ts",
+        "ExpressionAttributeNames": {"#ts": "timestamp"},
+    }
+    items = []
+    while True:
+        response = table.query(**args)
+        items.extend(response["Items"])
+        if "LastEvaluatedKey" not in response:
+            return items
+        args["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(size, session_items):
+    with mock_aws():
+        aws_clients.reset()
+        table = create_table()
+        fill(table, size, session_items)
+
+        found, ms = timed(scan_keys, table, TARGET_SESSION, False)
+        print(f"{size:>9} items  scan, first page   {ms:9.1f} ms  found {len(found)}/{session_items}")
+        found, ms = timed(scan_keys, table, TARGET_SESSION, True)
+        print(f"{size:>9} items  scan, all pages    {ms:9.1f} ms  found {len(found)}/{session_items}")
+        found, ms = timed(query_keys, table, TARGET_SESSION)
+        print(f"{size:>9} items  query              {ms:9.1f} ms  found {len(found)}/{session_items}")
+        message, ms = timed(Srinivas_code.delete_chat_history, TARGET_SESSION)
+        print(f"{size:>9} items  delete_chat_history {ms:8.1f} ms  {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan-based vs query-based chat history delete.")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated table sizes")
+    parser.add_argument("--session-items", type=int, default=500)
+    args = parser.parse_args()
+    for size in [int(s) for s in args.sizes.split(",")]:
+        run(size, args.session_items)
+
+
+if __name__ == "__main__":
+    main()
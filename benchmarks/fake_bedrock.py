@@ -0,0 +1,77 @@
+import math
+import threading
+import time
+
+import aws_clients
+
+
+class FakeBedrockRuntime:
+    """
+    Stand-in for the bedrock-runtime client. Latency follows a simple model:
+    a fixed overhead, prompt processing at prefill_tps, then output tokens
+    at output_tps. Token counts use the same 4-chars-per-token estimate as
+    context_builder.
+    """
+
+    def __init__(self, overhead=0.3, prefill_tps=4000, output_tps=60, output_tokens=200, scale=1.0):
+        self.overhead = overhead
+        self.prefill_tps = prefill_tps
+        self.output_tps = output_tps
+        self.output_tokens = output_tokens
+        self.scale = scale  # shrink every sleep for quick runs
+        self.calls = 0
+        self.input_tokens = 0
+        self.last_modeled = 0.0  # unscaled seconds the last converse call stands for
+        self.log = []  # (thread name, input tokens, modeled seconds) per converse call
+
+    def prompt_tokens(self, messages):
+        chars = 0
+        for message in messages:
+            for block in message["content"]:
+                chars += len(block.get("text", ""))
+                if "image" in block:
+                    chars += 1600 * 4  # Llama 3.2 vision charges ~1.6k tokens per image
+        return math.ceil(chars / 4)
+
+    def answer(self, tokens):
+        return " ".join(f"word{i}" for i in range(tokens))
+
+    def converse(self, modelId, messages, **kwargs):
+        self.calls += 1
+        input_tokens = self.prompt_tokens(messages)
+        self.input_tokens += input_tokens
+        self.last_modeled = (self.overhead + input_tokens / self.prefill_tps
+                             + self.output_tokens / self.output_tps)
+        self.log.append((threading.current_thread().name, input_tokens, self.last_modeled))
+        time.sleep(self.scale * self.last_modeled)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": self.answer(self.output_tokens)}]}},
+            "usage": {"inputTokens": input_tokens, "outputTokens": self.output_tokens,
+                      "totalTokens": input_tokens + self.output_tokens},
+            "stopReason": "end_turn",
+        }
+
+    def converse_stream(self, modelId, messages, **kwargs):
+        self.calls += 1
+        input_tokens = self.prompt_tokens(messages)
+        self.input_tokens += input_tokens
+
+        def events():
+            time.sleep(self.scale * (self.overhead + input_tokens / self.prefill_tps))
+            yield {"messageStart": {"role": "assistant"}}
+            for i in range(self.output_tokens):
+                time.sleep(self.scale / self.output_tps)
+                yield {"contentBlockDelta": {"delta": {"text": f"word{i} "}, "contentBlockIndex": 0}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            yield {"metadata": {"usage": {"inputTokens": input_tokens, "outputTokens": self.output_tokens,
+                                          "totalTokens": input_tokens + self.output_tokens}}}
+
+        return {"stream": events()}
+
+
+def install_fake_bedrock(fake, region_name="us-east-1"):
+    """
+    Make aws_clients hand out the fake for bedrock-runtime.
+    """
+    aws_clients._clients[("bedrock-runtime", region_name)] = fake
+    return fake
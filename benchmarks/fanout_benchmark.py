@@ -0,0 +1,70 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_newsapi import MockNewsAPIHandler, start_mock_newsapi
+
+
+def run(hquery, pairs, speculative):
+    """
+    Call trigger_news_api for every pair with the cache cleared each time,
+    so each call really goes to the mock server.
+    """
+    hquery.NEWS_SPECULATIVE = speculative
+    hquery.ENDPOINT_HINTS.clear()
+    MockNewsAPIHandler.calls = 0
+    latencies = []
+    for country, category in pairs:
+        hquery.news_cache.clear()
+        start = time.perf_counter()
+        hquery.trigger_news_api(country, category)
+        latencies.append(time.perf_counter() - start)
+    return latencies, MockNewsAPIHandler.calls
+
+
+def summarize(name, latencies, calls):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    print(f"{name:<12} mean {statistics.mean(latencies) * 1000:7.1f} ms  "
+          f"p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  upstream calls {calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs speculative NewsAPI fallback.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pairs", type=int, default=40, help="distinct (country, category) pairs")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock NewsAPI latency in seconds")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_newsapi(latency=args.latency)
+    os.environ["NEWS_API_URL"] = base_url
+    import hquery
+
+    # Popular pairs dominate real traffic, so draw from a Zipf-weighted pool
+    rng = random.Random(0)
+    pool = [
+        (country, category)
+        for country in hquery.COUNTRIES
+        for category in hquery.CATEGORIES + [None]
+    ]
+    rng.shuffle(pool)
+    pool = pool[:args.pairs]
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    pairs = rng.choices(pool, weights=weights, k=args.requests)
+
+    serial, serial_calls = run(hquery, pairs, speculative=False)
+    speculative, speculative_calls = run(hquery, pairs, speculative=True)
+    summarize("serial", serial, serial_calls)
+    summarize("speculative", speculative, speculative_calls)
+    saved = (sum(serial) - sum(speculative)) * 1000 / len(pairs)
+    print(f"Latency saved: {saved:.1f} ms/request on average")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "helpers"))
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from boto3.dynamodb.conditions import Key
+from moto import mock_aws
+
+import aws_clients
+import Srinivas_code
+from conversation_benchmark import PAGE_CONTENT, ask_event
+from dynamodb_delete_benchmark import create_table
+from fake_bedrock import FakeBedrockRuntime, install_fake_bedrock
+
+
+def item_size(item):
+    """
+    DynamoDB's billed item size: attribute names plus values, numbers
+    counted as roughly one byte per two digits.
+    """
+    size = 0
+    for name, value in item.items():
+        size += len(name)
+        if isinstance(value, str):
+            size += len(value.encode("utf-8"))
+        else:
+            size += len(str(value)) // 2 + 1
+    return size
+
+
+def write_units(items):
+    return sum(math.ceil(item_size(item) / 1024) for item in items)
+
+
+def run_sessions(sessions, turns, page_every):
+    latencies = []
+    for session in range(sessions):
+        for turn in range(1, turns + 1):
+            start = time.perf_counter()
+            Srinivas_code.lambda_handler(ask_event(f"history-{session}", turn, page_every), None)
+            latencies.append((time.perf_counter() - start) * 1000)
+            # Turns are keyed by millisecond timestamp; keep them distinct
+            time.sleep(0.002)
+    return latencies
+
+
+def stored_items(sessions):
+    table = aws_clients.dynamodb_table(Srinivas_code.TABLE_NAME, region_name="us-east-1")
+    items = []
+    for session in range(sessions):
+        items.extend(table.query(KeyConditionExpression=Key("sessionId").eq(f"history-{session}"))["Items"])
+    return items
+
+
+def p95(latencies):
+    return statistics.quantiles(latencies, n=20)[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ask-turn latency and write capacity: inline batch write vs queued, by-reference history.")
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--page-every", type=int, default=10)
+    args = parser.parse_args()
+
+    results = {}
+    with mock_aws():
+        aws_clients.reset()
+        create_table()
+        # Bedrock time is the same either way; leave it out
+        install_fake_bedrock(FakeBedrockRuntime(scale=0))
+        for name, asynchronous in (("inline batch", False), ("queued writer", True)):
+            Srinivas_code.HISTORY_ASYNC = asynchronous
+            Srinivas_code.conversations = Srinivas_code.ConversationStore(
+                loader=lambda session_id: None, max_turns=Srinivas_code.MAX_TURNS)
+            results[name] = run_sessions(args.sessions, args.turns, args.page_every)
+            Srinivas_code.history_writer.flush()
+            if not asynchronous:
+                for session in range(args.sessions):
+                    Srinivas_code.delete_chat_history(f"history-{session}")
+        items = stored_items(args.sessions)
+        reloaded = Srinivas_code.load_conversation("history-0")
+
+    for name, latencies in results.items():
+        print(f"{name:<16} median {statistics.median(latencies):6.2f} ms  p95 {p95(latencies):6.2f} ms")
+
+    turn_items = [item for item in items if item["timestamp"] > 0]
+    legacy = [dict(item, pageContent=PAGE_CONTENT) for item in turn_items]
+    print(f"write units, page per turn  {write_units(legacy):6d}  ({len(legacy)} items)")
+    print(f"write units, page by ref    {write_units(items):6d}  ({len(items)} items)")
+    print(f"Queued writer: {Srinivas_code.history_writer.written} items written, {Srinivas_code.history_writer.failures} failed batches")
+    print(f"Reloaded session: {len(reloaded.turns)} turns, {len(reloaded.pages)} pages with content")
+
+
+if __name__ == "__main__":
+    main()
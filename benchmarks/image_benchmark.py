@@ -0,0 +1,161 @@
+import argparse
+import hashlib
+import os
+import resource
+import subprocess
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageFilter
+
+import http_session
+import image_cache
+
+SIZES = [(4000, 3000), (6000, 4000), (3000, 4500), (2400, 1600), (1000, 750)]
+
+
+def make_corpus(count):
+    """
+    Photo-sized JPEGs (and one PNG in five) with enough texture that the
+    encoder can't shrink them to nothing.
+    """
+    corpus = {}
+    for i in range(count):
+        width, height = SIZES[i % len(SIZES)]
+        image = Image.effect_noise((width // 8, height // 8), 60 + i).convert("RGB")
+        image = image.resize((width, height), Image.Resampling.BILINEAR).filter(ImageFilter.SMOOTH)
+        output = BytesIO()
+        image_format = "PNG" if i % 5 == 4 else "JPEG"
+        image.save(output, format=image_format, quality=90)
+        corpus[f"/photo{i}.{image_format.lower()}"] = output.getvalue()
+    return corpus
+
+
+class PhotoHandler(BaseHTTPRequestHandler):
+    """
+    Static image server that sends ETags and honours If-None-Match.
+    """
+    corpus = {}
+
+    def do_GET(self):
+        body = self.corpus.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def legacy_pipeline(url):
+    """
+    The old handler code: full download, full decode, LANCZOS resize.
+    """
+    image_data = http_session.get(url).content
+    image = Image.open(BytesIO(image_data))
+    width, height = image.size
+    image_format = image.format
+    if max(width, height) > 1120:
+        scaling_factor = 1120 / max(width, height)
+        image = image.resize((int(width * scaling_factor), int(height * scaling_factor)), Image.Resampling.LANCZOS)
+        output = BytesIO()
+        image.save(output, format=image_format)
+        image_data = output.getvalue()
+    return image_data, image_format.lower()
+
+
+def timed(fn, urls):
+    latencies = []
+    for url in urls:
+        start = time.perf_counter()
+        fn(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def peak_rss(pipeline, url):
+    """
+    Peak resident memory in MB of a fresh interpreter preparing one image.
+    """
+    output = subprocess.run(
+        [sys.executable, __file__, "--rss-child", pipeline, url],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def high_water_kb():
+    """
+    Peak RSS of this process. ru_maxrss survives exec on Linux and would
+    report the parent's peak, so read VmHWM when it's available.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def rss_child(pipeline, url):
+    baseline = high_water_kb()
+    fn = legacy_pipeline if pipeline == "legacy" else image_cache.load_image
+    fn(url)
+    print((high_water_kb() - baseline) / 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image fetch/resize: legacy vs cached draft-mode pipeline.")
+    parser.add_argument("--images", type=int, default=10)
+    parser.add_argument("--rss-child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.rss_child:
+        rss_child(*args.rss_child)
+        return
+
+    print("Building corpus...")
+    PhotoHandler.corpus = make_corpus(args.images)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PhotoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [base + path for path in PhotoHandler.corpus]
+    mean_mb = statistics.mean(len(body) for body in PhotoHandler.corpus.values()) / 1e6
+    print(f"{len(urls)} images, mean {mean_mb:.1f} MB")
+
+    for name, fn in (
+        ("legacy decode+resize", legacy_pipeline),
+        ("cold cache (draft)", image_cache.load_image),
+        ("warm cache (304)", image_cache.load_image),
+    ):
+        latencies = timed(fn, urls)
+        print(f"{name:<22} median {statistics.median(latencies):8.1f} ms  max {max(latencies):8.1f} ms")
+
+    # Largest image in the corpus, each pipeline in its own process
+    largest = base + max(PhotoHandler.corpus, key=lambda path: len(PhotoHandler.corpus[path]))
+    for pipeline in ("legacy", "stage"):
+        print(f"peak RSS growth, {pipeline:<7} {peak_rss(pipeline, largest):7.1f} MB")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INFERENCE_SERVER = os.path.join(ROOT, "Localhost_attempt", "ConvoBotDocker", "inference.py")
+
+CONTEXT = (
+    "The central bank held interest rates steady on Wednesday, citing cooling inflation "
+    "and a resilient labour market. Officials signalled that cuts could come later in the year "
+    "if price growth keeps slowing. Shares of regional banks rose after the announcement, while "
+    "the dollar weakened against major currencies. "
+)
+QUESTIONS = [
+    "What did the central bank do with interest rates?",
+    "Why did officials hold rates steady?",
+    "What happened to shares of regional banks?",
+    "How did the dollar react?",
+]
+
+
+def payload(i):
+    # Contexts of different lengths, so batches need real padding
+    return {"question": QUESTIONS[i % len(QUESTIONS)], "context": CONTEXT * (1 + i % 4)}
+
+
+def wait_ready(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url + "/ping", timeout=2).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"{url} not ready after {timeout} s")
+
+
+def load(url, concurrency, requests_per_client):
+    """
+    concurrency clients each sending requests back to back. Returns the
+    per-request latencies in ms and the wall time in seconds.
+    """
+    latencies = []
+    errors = []
+
+    def client(offset):
+        session = requests.Session()
+        for i in range(requests_per_client):
+            start = time.perf_counter()
+            response = session.post(url + "/invocations", json=payload(offset + i), timeout=120)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start, errors
+
+
+def start_server(window_ms, max_batch, port):
+    env = dict(os.environ, BATCH_WINDOW_MS=str(window_ms), MAX_BATCH_SIZE=str(max_batch), PORT=str(port))
+    return subprocess.Popen([sys.executable, INFERENCE_SERVER], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def report(label, latencies, seconds, errors):
+    p99 = statistics.quantiles(latencies, n=100)[-1]
+    print(f"{label:<14} {len(latencies) / seconds:8.1f} req/s  p50 {statistics.median(latencies):8.1f} ms  "
+          f"p99 {p99:8.1f} ms  errors {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/invocations throughput and latency versus batch window.")
+    parser.add_argument("--url", help="load an already running server instead of starting one per window")
+    parser.add_argument("--windows", default="0,2,5,10,20", help="BATCH_WINDOW_MS values, comma separated")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--startup-timeout", type=int, default=600)
+    args = parser.parse_args()
+
+    if args.url:
+        wait_ready(args.url, args.startup_timeout)
+        load(args.url, 1, 2)  # warm-up
+        report("server", *load(args.url, args.concurrency, args.requests))
+        return
+
+    url = f"http://127.0.0.1:{args.port}"
+    print(f"{args.concurrency} clients x {args.requests} requests, max batch {args.max_batch}")
+    for window in args.windows.split(","):
+        server = start_server(window, args.max_batch, args.port)
+        try:
+            wait_ready(url, args.startup_timeout)
+            load(url, 1, 2)
+            report(f"window {window} ms", *load(url, args.concurrency, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import hquery
+
+TEMPLATES = [
+    "What are the headlines in {country}?",
+    "Latest {category} news in {country}",
+    "what's happening in {country} {category}",
+    "{country} {category} news today",
+    "Give me the top {category} stories",
+    "Any updates on {category} from {country}?",
+    "Summarize the news for {country}.",
+    "tell me something interesting",
+    "news about {country}s abroad",
+    "{category}care in {country}",
+]
+
+
+def legacy_extract(query):
+    """
+    The original per-key substring loop, kept here as the baseline.
+    """
+    query = hquery.preprocess_query(query)
+    country = None
+    category = None
+    for c in hquery.COUNTRIES.keys():
+        if c in query:
+            country = c
+            break
+    for cat in hquery.CATEGORIES:
+        if cat in query:
+            category = cat
+            break
+    return country, category
+
+
+def load_queries(path, count):
+    """
+    Read logged queries (one per line) or synthesize `count` of them.
+    """
+    if path:
+        with open(path) as f:
+            return [line.strip() for line in f if line.strip()]
+    rng = random.Random(0)
+    countries = list(hquery.COUNTRIES) + list(hquery.COUNTRY_ALIASES)
+    categories = hquery.CATEGORIES + list(hquery.CATEGORY_ALIASES)
+    return [
+        rng.choice(TEMPLATES).format(country=rng.choice(countries), category=rng.choice(categories))
+        for _ in range(count)
+    ]
+
+
+def compare(queries):
+    """
+    Where the compiled matcher's first country/category differs from the
+    legacy loop's. Returns {kind: [(query, legacy, compiled)]}: "lost" when
+    only the legacy loop found something, "gained" when only the matcher
+    did, "different" when both found different things.
+    """
+    found = {"lost": [], "gained": [], "different": []}
+    for query in queries:
+        countries, categories = hquery.match_keywords(query)
+        compiled = (countries[0] if countries else None, categories[0] if categories else None)
+        legacy = legacy_extract(query)
+        for old, new in zip(legacy, compiled):
+            if old == new:
+                continue
+            kind = "gained" if old is None else "lost" if new is None else "different"
+            found[kind].append((query, legacy, compiled))
+            break
+    return found
+
+
+def time_it(fn, queries, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            fn(query)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare keyword extraction strategies.")
+    parser.add_argument("--queries", help="file of logged queries, one per line")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--examples", type=int, default=5, help="disagreements to print per kind")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries, args.count)
+    legacy = time_it(legacy_extract, queries, args.repeat)
+    compiled = time_it(hquery.match_keywords, queries, args.repeat)
+
+    print(f"Queries: {len(queries)}")
+    print(f"Legacy loop:      {legacy * 1e6 / len(queries):.2f} us/query")
+    print(f"Compiled matcher: {compiled * 1e6 / len(queries):.2f} us/query")
+    print(f"Speedup: {legacy / compiled:.2f}x")
+
+    # Legacy returns the first key in dict order, the matcher the first in
+    # the query, and only the matcher knows aliases, so "different" and
+    # "gained" are expected; "lost" is a regression
+    disagreements = compare(queries)
+    for kind, rows in disagreements.items():
+        print(f"{kind}: {len(rows)} queries")
+        for query, old, new in rows[:args.examples]:
+            print(f"  {query!r}: legacy {old}, compiled {new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from moto import mock_aws
+
+from fake_bedrock import FakeBedrockRuntime, install_fake_bedrock
+from mock_newsapi import start_mock_newsapi
+
+QUERY_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_log.txt")
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {
+        "mean": round(statistics.mean(values), 3),
+        "p50": round(pick(0.50), 3),
+        "p95": round(pick(0.95), 3),
+        "p99": round(pick(0.99), 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def load_queries(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def reset_caches(hquery, cached):
+    hquery.answer_cache = hquery.AnswerCache(
+        ttl=hquery.ANSWER_CACHE_TTL,
+        threshold=hquery.ANSWER_CACHE_THRESHOLD if cached else float("inf"),
+    )
+    hquery.news_cache.clear()
+    hquery.news_cache.memory.max_entries = hquery.NEWS_CACHE_SIZE if cached else 0
+    hquery.ENDPOINT_HINTS.clear()
+
+
+def run_level(hquery, queries, requests, concurrency):
+    """
+    Send requests queries (cycling through the log) through
+    lambda_handler from concurrency threads.
+    Returns (latencies ms, status codes, trace records, wall seconds).
+    """
+    records = []
+    lock = threading.Lock()
+
+    def collect(record):
+        with lock:
+            records.append(record)
+
+    def call(query):
+        start = time.perf_counter()
+        response = hquery.lambda_handler({"queryStringParameters": {"q": query}}, None)
+        return (time.perf_counter() - start) * 1000, response["statusCode"]
+
+    batch = [queries[i % len(queries)] for i in range(requests)]
+    hquery.tracing.listeners.append(collect)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(call, batch))
+        wall = time.perf_counter() - start
+    finally:
+        hquery.tracing.listeners.remove(collect)
+    return [r[0] for r in results], [r[1] for r in results], records, wall
+
+
+def stage_breakdown(records):
+    stages = {}
+    for record in records:
+        for key, value in record.items():
+            if key.endswith("_ms") and key != "total_ms":
+                stages.setdefault(key, []).append(value)
+    return {key: dict(percentiles(values), count=len(values)) for key, values in sorted(stages.items())}
+
+
+def compare(report, baseline_path):
+    """
+    Print p50/p95/p99 change against an earlier report, per concurrency.
+    """
+    with open(baseline_path) as f:
+        baseline = {run["concurrency"]: run for run in json.load(f)["runs"]}
+    for run in report["runs"]:
+        before = baseline.get(run["concurrency"])
+        if before is None:
+            continue
+        changes = []
+        for q in ("p50", "p95", "p99"):
+            old, new = before["latency_ms"][q], run["latency_ms"][q]
+            changes.append(f"{q} {old:.1f} -> {new:.1f} ms ({(new - old) / old:+.0%})")
+        print(f"concurrency {run['concurrency']:>3}: " + ", ".join(changes), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of hquery.lambda_handler with local stand-ins; JSON report.")
+    parser.add_argument("--queries", default=QUERY_LOG, help="query log, one query per line")
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma separated levels")
+    parser.add_argument("--no-cache", action="store_true", help="disable the answer and news caches")
+    parser.add_argument("--newsapi-latency", type=float, default=0.15, help="mock NewsAPI latency in seconds")
+    parser.add_argument("--bedrock-overhead", type=float, default=0.3, help="seconds per Bedrock call")
+    parser.add_argument("--prefill-tps", type=float, default=4000)
+    parser.add_argument("--output-tps", type=float, default=60)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--bedrock-scale", type=float, default=0.1, help="fraction of modeled Bedrock latency to sleep")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to compare latencies against")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_newsapi(latency=args.newsapi_latency)
+    os.environ["NEWS_API_URL"] = base_url
+    import aws_clients
+    import hquery
+    import tracing
+
+    # hquery sets the root logger to INFO; moto's per-request logging would drown the report
+    logging.getLogger().setLevel(logging.WARNING)
+    # Records reach us through the listener; keep them out of stdout
+    tracing.TRACE_SAMPLE_RATE = 0
+    tracing.TRACE_SLOW_MS = float("inf")
+    queries = load_queries(args.queries)
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "environment": {"python": platform.python_version(), "cpus": os.cpu_count()},
+        "runs": [],
+    }
+    with mock_aws():
+        aws_clients.reset()
+        aws_clients.client("s3").create_bucket(Bucket=hquery.INPUT_BUCKET)
+        fake = install_fake_bedrock(FakeBedrockRuntime(
+            overhead=args.bedrock_overhead, prefill_tps=args.prefill_tps, output_tps=args.output_tps,
+            output_tokens=args.output_tokens, scale=args.bedrock_scale,
+        ))
+        for concurrency in (int(level) for level in args.concurrency.split(",")):
+            reset_caches(hquery, not args.no_cache)
+            calls_before = fake.calls
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                latencies, statuses, records, wall = run_level(hquery, queries, args.requests, concurrency)
+                hquery.archive_executor.submit(lambda: None).result()
+            report["runs"].append({
+                "concurrency": concurrency,
+                "requests": args.requests,
+                "throughput_rps": round(args.requests / wall, 2),
+                "latency_ms": percentiles(latencies),
+                "status": dict(Counter(str(status) for status in statuses)),
+                "bedrock_calls": fake.calls - calls_before,
+                "answer_cache": hquery.answer_cache.stats(),
+                "stages": stage_breakdown(records),
+                "input_tokens": percentiles([r.get("input_tokens", 0) for r in records if "input_tokens" in r]),
+            })
+    server.shutdown()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Only these countries get top-headlines back; the rest come back empty,
+# which is what the live NewsAPI does for most non-US countries
+HEADLINE_COUNTRIES = {"us", "gb", "ca", "au", "de", "fr", "jp", "kr", "br", "mx"}
+
+
+def make_articles(label, count):
+    return [
+        {
+            "source": {"id": None, "name": "Mock Wire"},
+            "title": f"{label} story {i}",
+            "description": f"Mock description {i} about {label}.",
+            "url": f"https://example.com/{label.replace(' ', '-')}/{i}",
+            "publishedAt": "2024-12-01T00:00:00Z",
+        }
+        for i in range(count)
+    ]
+
+
+class MockNewsAPIHandler(BaseHTTPRequestHandler):
+    """
+    Serves /v2/top-headlines and /v2/everything with a fixed latency.
+    """
+    latency = 0.2
+    calls = 0
+
+    def do_GET(self):
+        type(self).calls += 1
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path.endswith("/top-headlines"):
+            country = params.get("country", "")
+            count = 20 if country in HEADLINE_COUNTRIES or not country else 0
+            label = f"{country} {params.get('category', '')}".strip()
+        elif url.path.endswith("/everything"):
+            count = 100
+            label = params.get("q", "")
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps({"status": "ok", "totalResults": count, "articles": make_articles(label, count)})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_newsapi(latency=0.2, port=0):
+    """
+    Start the mock server on a background thread. Returns (server, base_url).
+    """
+    MockNewsAPIHandler.latency = latency
+    MockNewsAPIHandler.calls = 0
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockNewsAPIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v2"
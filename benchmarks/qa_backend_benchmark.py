@@ -0,0 +1,105 @@
+import argparse
+import os
+import re
+import statistics
+import string
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Localhost_attempt", "ConvoBotDocker"))
+
+from transformers import AutoModelForQuestionAnswering, AutoTokenizer, pipeline
+
+# Fixed news QA pairs: (context, question, expected answer)
+NEWS_QA = [
+    ("The Federal Reserve held its benchmark rate at 5.25% on Wednesday, saying inflation had eased but remained above its 2% target.",
+     "At what level did the Federal Reserve hold its benchmark rate?", "5.25%"),
+    ("The Federal Reserve held its benchmark rate at 5.25% on Wednesday, saying inflation had eased but remained above its 2% target.",
+     "What is the Federal Reserve's inflation target?", "2%"),
+    ("Apple unveiled the iPhone 16 at its September event in Cupertino, adding a dedicated camera button and a faster A18 chip.",
+     "Which chip powers the iPhone 16?", "A18"),
+    ("Apple unveiled the iPhone 16 at its September event in Cupertino, adding a dedicated camera button and a faster A18 chip.",
+     "Where was the September event held?", "Cupertino"),
+    ("Real Madrid beat Borussia Dortmund 2-0 at Wembley to win their 15th European Cup, with Dani Carvajal scoring the opener.",
+     "Who scored the opening goal?", "Dani Carvajal"),
+    ("Real Madrid beat Borussia Dortmund 2-0 at Wembley to win their 15th European Cup, with Dani Carvajal scoring the opener.",
+     "Which team lost the final?", "Borussia Dortmund"),
+    ("Health officials in Brazil reported 6.5 million dengue cases this year, the most since records began in 2000.",
+     "How many dengue cases did Brazil report?", "6.5 million"),
+    ("Health officials in Brazil reported 6.5 million dengue cases this year, the most since records began in 2000.",
+     "When did records begin?", "2000"),
+    ("NASA's Europa Clipper launched from Kennedy Space Center on a Falcon Heavy rocket and will reach Jupiter's moon in 2030.",
+     "Which rocket launched Europa Clipper?", "Falcon Heavy"),
+    ("NASA's Europa Clipper launched from Kennedy Space Center on a Falcon Heavy rocket and will reach Jupiter's moon in 2030.",
+     "When will the probe reach Europa?", "2030"),
+    ("Toyota said it would invest $8 billion in a North Carolina battery plant, raising the site's planned workforce to 5,000.",
+     "How much will Toyota invest in the battery plant?", "$8 billion"),
+    ("Toyota said it would invest $8 billion in a North Carolina battery plant, raising the site's planned workforce to 5,000.",
+     "In which state is the battery plant?", "North Carolina"),
+]
+
+
+def normalize(text):
+    text = "".join(ch for ch in text.lower() if ch not in string.punctuation)
+    text = re.sub(r"\b(a|an|the)\b", " ", text)
+    return text.split()
+
+
+def f1(prediction, expected):
+    predicted, truth = normalize(prediction), normalize(expected)
+    common = sum((Counter(predicted) & Counter(truth)).values())
+    if common == 0:
+        return 0.0
+    precision, recall = common / len(predicted), common / len(truth)
+    return 2 * precision * recall / (precision + recall)
+
+
+def evaluate(qa, repeats):
+    latencies = []
+    exact = 0
+    f1_total = 0.0
+    qa(question=NEWS_QA[0][1], context=NEWS_QA[0][0])  # warm-up
+    for context, question, expected in NEWS_QA:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            answer = qa(question=question, context=context)["answer"]
+            latencies.append((time.perf_counter() - start) * 1000)
+        exact += normalize(answer) == normalize(expected)
+        f1_total += f1(answer, expected)
+    return exact / len(NEWS_QA), f1_total / len(NEWS_QA), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QA accuracy and CPU latency: PyTorch fp32 vs ONNX fp32 vs ONNX int8.")
+    parser.add_argument("--model", default="./model", help="directory written by model_save.py")
+    parser.add_argument("--tokenizer", default="./tokenizer")
+    parser.add_argument("--onnx-dir", default="./onnx", help="directory written by onnx_export.py")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0, help="torch/onnxruntime threads, 0 for the default")
+    args = parser.parse_args()
+
+    import torch
+    from onnx_qa import OnnxQuestionAnswerer
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    backends = [
+        ("pytorch fp32", pipeline("question-answering", model=AutoModelForQuestionAnswering.from_pretrained(args.model),
+                                  tokenizer=tokenizer, device="cpu")),
+        ("onnx fp32", OnnxQuestionAnswerer(os.path.join(args.onnx_dir, "model.onnx"), tokenizer, threads=args.threads)),
+        ("onnx int8", OnnxQuestionAnswerer(os.path.join(args.onnx_dir, "model.int8.onnx"), tokenizer, threads=args.threads)),
+    ]
+    print(f"{len(NEWS_QA)} questions x {args.repeats} repeats")
+    for name, qa in backends:
+        exact, mean_f1, latencies = evaluate(qa, args.repeats)
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{name:<13} EM {exact:5.1%}  F1 {mean_f1:5.1%}  mean {statistics.mean(latencies):7.1f} ms  p95 {p95:7.1f} ms")
+    for name in ("model.onnx", "model.int8.onnx"):
+        print(f"{name:<16} {os.path.getsize(os.path.join(args.onnx_dir, name)) / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from article_index import DEFAULT_EMBEDDING_MODEL, ArticleIndex, Embedder
+from context_builder import rank_articles
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval_corpus.json")
+K_VALUES = (1, 3, 5)
+
+
+def recall(ranked_urls, relevant, k):
+    return len(set(ranked_urls[:k]) & set(relevant)) / len(relevant)
+
+
+def keyword_ranking(query, articles):
+    """
+    What build_context does today: order by query terms in title/description.
+    """
+    ranked = rank_articles(query, [(a["title"], a["description"]) for a in articles])
+    by_text = {(a["title"], a["description"]): a["url"] for a in articles}
+    return [by_text[item] for item in ranked]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k and latency of the article embedding index on a stored corpus.")
+    parser.add_argument("--corpus", default=CORPUS, help="JSON with articles and queries labelled with relevant URLs")
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL)
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the queries for latency")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="index sizes for the search-only timing")
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        corpus = json.load(f)
+    articles, queries = corpus["articles"], corpus["queries"]
+
+    embedder = Embedder(args.model)
+    start = time.perf_counter()
+    embedder.embed(["warm up"])
+    load_s = time.perf_counter() - start
+
+    index = ArticleIndex(embedder)
+    start = time.perf_counter()
+    embedded = index.upsert(articles)
+    cold_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    reembedded = index.upsert(articles)
+    warm_ms = (time.perf_counter() - start) * 1000
+
+    rankings = {
+        "newsapi order": lambda query: [a["url"] for a in articles],
+        "keyword rank": lambda query: keyword_ranking(query, articles),
+        "embedding index": lambda query: [url for url, _ in index.search(query, k=max(K_VALUES))],
+    }
+    print(f"{len(articles)} articles, {len(queries)} labelled queries, model {args.model} (loaded in {load_s:.1f} s)")
+    print(f"{'':<16}" + "".join(f"  recall@{k}" for k in K_VALUES))
+    for name, rank in rankings.items():
+        ranked = [(rank(q["query"]), q["relevant"]) for q in queries]
+        row = [statistics.mean(recall(urls, relevant, k) for urls, relevant in ranked) for k in K_VALUES]
+        print(f"{name:<16}" + "".join(f"  {value:8.3f}" for value in row))
+
+    latencies = []
+    for _ in range(args.repeat):
+        for q in queries:
+            start = time.perf_counter()
+            index.search(q["query"], k=5)
+            latencies.append((time.perf_counter() - start) * 1000)
+    print(f"upsert: {embedded} embedded in {cold_ms:.1f} ms ({cold_ms / embedded:.2f} ms/article), "
+          f"repeat upsert embedded {reembedded} in {warm_ms:.2f} ms")
+    print(f"query (embed + search): p50 {statistics.median(latencies):.2f} ms  p95 {percentile(latencies, 0.95):.2f} ms")
+
+    # Search alone, on random unit rows of the model's width, to see how it scales
+    rng = np.random.default_rng(0)
+    vector = embedder.embed([queries[0]["query"]])[0]
+    for size in (int(s) for s in args.sizes.split(",")):
+        matrix = rng.standard_normal((size, vector.shape[0]), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        timings = []
+        for _ in range(50):
+            start = time.perf_counter()
+            scores = matrix @ vector
+            top = np.argpartition(-scores, 4)[:5]
+            top[np.argsort(-scores[top])]
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"search over {size:>6} rows: p50 {statistics.median(timings):.3f} ms  "
+              f"({matrix.nbytes / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
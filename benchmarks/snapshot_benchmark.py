@@ -0,0 +1,109 @@
+import argparse
+import contextlib
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from moto import mock_aws
+
+from fake_bedrock import FakeBedrockRuntime, install_fake_bedrock
+from mock_newsapi import MockNewsAPIHandler, start_mock_newsapi
+
+
+def query_stream(hquery, count, pairs, seed):
+    """
+    count queries over the top pairs of a Zipf-weighted pool, the way real
+    traffic piles onto a few popular country/category pairs.
+    """
+    rng = random.Random(0)
+    pool = [(country, category) for country in hquery.COUNTRIES for category in hquery.CATEGORIES]
+    rng.shuffle(pool)
+    pool = pool[:pairs]
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    draws = random.Random(seed).choices(pool, weights=weights, k=count)
+    return [f"latest {category} news in {country}" for country, category in draws]
+
+
+def replay(hquery, tracing, queries):
+    """
+    Run queries through lambda_handler; returns the time each spent getting
+    news (snapshot read plus any NewsAPI call) and the NewsAPI calls made.
+    """
+    news_ms = []
+    collect = lambda record: news_ms.append(record.get("snapshot_ms", 0) + record.get("newsapi_ms", 0))
+    tracing.listeners.append(collect)
+    calls_before = MockNewsAPIHandler.calls
+    try:
+        for query in queries:
+            hquery.news_cache.clear()
+            hquery.lambda_handler({"queryStringParameters": {"q": query}}, None)
+    finally:
+        tracing.listeners.remove(collect)
+    return news_ms, MockNewsAPIHandler.calls - calls_before
+
+
+def summarize(name, news_ms, calls, stats):
+    news_ms = sorted(news_ms)
+    p95 = news_ms[int(len(news_ms) * 0.95) - 1]
+    print(f"{name:<14} news p50 {statistics.median(news_ms):7.1f} ms  p95 {p95:7.1f} ms  "
+          f"NewsAPI calls {calls:4d}  snapshot hit ratio {stats['hit_ratio']:.2f}  mean age {stats['mean_age_s']} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="News fetch latency and NewsAPI calls: on demand vs prefetched snapshots.")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--pairs", type=int, default=60, help="distinct (country, category) pairs in traffic")
+    parser.add_argument("--budget", type=int, default=40, help="NewsAPI requests the prefetch run may spend")
+    parser.add_argument("--latency", type=float, default=0.15, help="mock NewsAPI latency in seconds")
+    args = parser.parse_args()
+
+    snapshot_dir = tempfile.mkdtemp(prefix="snapshots-")
+    server, base_url = start_mock_newsapi(latency=args.latency)
+    os.environ["NEWS_API_URL"] = base_url
+    os.environ["SNAPSHOT_DIR"] = snapshot_dir
+    import aws_clients
+    import hquery
+    import news_prefetch
+    import tracing
+
+    logging.getLogger().setLevel(logging.WARNING)
+    tracing.TRACE_SAMPLE_RATE = 0
+    tracing.TRACE_SLOW_MS = float("inf")
+    # Every request should reach the news step
+    hquery.answer_cache.threshold = float("inf")
+    hquery.NEWS_SPECULATIVE = False
+
+    with mock_aws():
+        aws_clients.reset()
+        aws_clients.client("s3").create_bucket(Bucket=hquery.INPUT_BUCKET)
+        install_fake_bedrock(FakeBedrockRuntime(scale=0))
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            cold, cold_calls = replay(hquery, tracing, query_stream(hquery, args.requests, args.pairs, seed=1))
+            cold_stats = hquery.snapshots.stats()
+            hquery.snapshots.flush_counts()
+            report = news_prefetch.run_prefetch(hquery.snapshots, budget=args.budget, rate=50)
+            hquery.snapshots.hits = hquery.snapshots.misses = hquery.snapshots.stale = 0
+            hquery.snapshots.served_age = 0.0
+            warm, warm_calls = replay(hquery, tracing, query_stream(hquery, args.requests, args.pairs, seed=2))
+            warm_stats = hquery.snapshots.stats()
+            hquery.archive_executor.submit(lambda: None).result()
+    server.shutdown()
+
+    print(f"{args.requests} queries over {args.pairs} pairs, prefetch budget {args.budget} requests")
+    summarize("on demand", cold, cold_calls, cold_stats)
+    print(f"prefetch run   refreshed {report['refreshed']} of {report['grid_pairs']} pairs with {report['requests']} requests "
+          f"in {report['seconds']} s, weighted coverage {report['weighted_coverage']}")
+    summarize("snapshots", warm, warm_calls, warm_stats)
+
+
+if __name__ == "__main__":
+    main()
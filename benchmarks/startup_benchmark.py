@@ -0,0 +1,144 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(ROOT, "Localhost_attempt", "ConvoBotDocker")
+
+# name -> environment for gunicorn.conf.py / inference.py
+MODES = {
+    "hub download": {"MODEL_SOURCE": "huggingface", "PRELOAD_APP": "0"},
+    "local, per worker": {"MODEL_SOURCE": "local", "PRELOAD_APP": "0"},
+    "local, preloaded": {"MODEL_SOURCE": "local", "PRELOAD_APP": "1"},
+}
+
+
+def memory_kb(pid):
+    """
+    (Rss, Pss) of a process in kB. Pss splits shared pages between the
+    processes mapping them, so it shows what copy-on-write sharing saves.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            fields = line.split()
+            if fields[0] in ("Rss:", "Pss:"):
+                values[fields[0]] = int(fields[1])
+    return values["Rss:"], values["Pss:"]
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+class Container:
+    """
+    A docker run of the QA image, with the parts of Popen that start() and
+    main() use. pid is the container's PID 1 as seen from the host.
+
+    The container is started the way SageMaker starts it, with a `serve`
+    argument, and PID 1 must end up being gunicorn.
+    """
+
+    def __init__(self, image, env, model_dir, port):
+        args = ["docker", "run", "-d", "--rm", "-p", f"{port}:8080", "-v", f"{model_dir}:/opt/ml/model:ro"]
+        for name, value in env.items():
+            args += ["-e", f"{name}={value}"]
+        self.id = subprocess.run(args + [image, "serve"], check=True, capture_output=True, text=True).stdout.strip()
+        self.returncode = None
+        self.pid = int(self.inspect("{{.State.Pid}}") or 0)
+        # The serve script execs gunicorn; give it a moment to get there
+        deadline = time.perf_counter() + 5
+        command = ""
+        while self.pid and "gunicorn" not in command and time.perf_counter() < deadline:
+            try:
+                with open(f"/proc/{self.pid}/cmdline", "rb") as f:
+                    command = f.read().replace(b"\0", b" ").decode()
+            except FileNotFoundError:
+                break
+            time.sleep(0.05)
+        if "gunicorn" not in command:
+            self.terminate()
+            raise RuntimeError(f"container started with serve runs {command!r}, not gunicorn")
+
+    def inspect(self, template):
+        return subprocess.run(
+            ["docker", "inspect", "-f", template, self.id], capture_output=True, text=True,
+        ).stdout.strip()
+
+    def poll(self):
+        if self.inspect("{{.State.Running}}") != "true":
+            self.returncode = 1
+        return self.returncode
+
+    def terminate(self):
+        subprocess.run(["docker", "stop", self.id], capture_output=True)
+
+    def wait(self):
+        return self.returncode
+
+
+def start(mode_env, model_dir, workers, port, timeout, image=None):
+    """
+    Start gunicorn, directly or in the image's container, and wait until
+    every worker answers /ping with 200. Returns (process, seconds to ready).
+    """
+    begin = time.perf_counter()
+    if image:
+        server = Container(image, dict(mode_env, WORKERS=str(workers)), model_dir, port)
+    else:
+        env = dict(os.environ, MODEL_DIR=model_dir, WORKERS=str(workers), PORT=str(port), **mode_env)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "inference:app"],
+            cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+    url = f"http://127.0.0.1:{port}/ping"
+    healthy = 0
+    while time.perf_counter() - begin < timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {server.returncode}")
+        try:
+            # Pings land on any worker; count consecutive healthy answers
+            healthy = healthy + 1 if requests.get(url, timeout=2).status_code == 200 else 0
+        except requests.ConnectionError:
+            healthy = 0
+        if healthy >= 4 * workers:
+            return server, time.perf_counter() - begin
+        time.sleep(0.1)
+    server.terminate()
+    raise TimeoutError(f"not ready after {timeout} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start and per-worker memory of the QA server by startup mode.")
+    parser.add_argument("--model-dir", default="/opt/ml/model", help="directory holding model/ and tokenizer/")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--modes", default=",".join(MODES), help="comma separated, from: " + ", ".join(MODES))
+    parser.add_argument("--timeout", type=int, default=900)
+    parser.add_argument("--image", help="measure this built image (docker run <image> serve) instead of a local gunicorn")
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, model from {args.model_dir}" + (f", image {args.image}" if args.image else ""))
+    for name in args.modes.split(","):
+        server, seconds = start(MODES[name], args.model_dir, args.workers, args.port, args.timeout, args.image)
+        try:
+            master = memory_kb(server.pid)
+            workers = [memory_kb(pid) for pid in children(server.pid)]
+            rss = sum(w[0] for w in workers) / len(workers) / 1024
+            pss = sum(w[1] for w in workers) / len(workers) / 1024
+            total_pss = (master[1] + sum(w[1] for w in workers)) / 1024
+            print(f"{name:<18} ready {seconds:6.1f} s  worker RSS {rss:7.1f} MB  worker PSS {pss:7.1f} MB  "
+                  f"total PSS {total_pss:7.1f} MB")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import contextlib
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from moto import mock_aws
+
+from fake_bedrock import FakeBedrockRuntime, install_fake_bedrock
+from mock_newsapi import start_mock_newsapi
+
+GENERIC_TEMPLATES = ["latest {category} news in {country}", "{category} headlines in {country}",
+                     "what's happening in {category} in {country}", "top {category} stories from {country}"]
+SPECIFIC_TEMPLATES = ["what did {country} announce about {category} regulation",
+                      "how are {category} companies in {country} reacting to the strike"]
+
+
+def query_stream(hquery, count, pairs, generic_share, seed):
+    """
+    Zipf-weighted (country, category) traffic; generic_share of the queries
+    ask for the plain headlines, the rest ask something specific.
+    """
+    rng = random.Random(0)
+    pool = [(country, category) for country in hquery.COUNTRIES for category in hquery.CATEGORIES]
+    rng.shuffle(pool)
+    pool = pool[:pairs]
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    rng = random.Random(seed)
+    queries = []
+    for country, category in rng.choices(pool, weights=weights, k=count):
+        templates = GENERIC_TEMPLATES if rng.random() < generic_share else SPECIFIC_TEMPLATES
+        queries.append(rng.choice(templates).format(country=country, category=category))
+    return queries
+
+
+def replay(hquery, fake, queries, is_generic):
+    """
+    Per-query latency with the fake's scaled-down sleep swapped for the
+    Bedrock latency it models, split by generic and specific queries.
+    """
+    latencies = {True: [], False: []}
+    calls_before = fake.calls
+    for query in queries:
+        hquery.news_cache.clear()
+        calls = fake.calls
+        start = time.perf_counter()
+        hquery.lambda_handler({"queryStringParameters": {"q": query}}, None)
+        elapsed = time.perf_counter() - start
+        if fake.calls > calls:
+            elapsed += fake.last_modeled * (1 - fake.scale)
+        latencies[is_generic(query)].append(elapsed * 1000)
+    return latencies, fake.calls - calls_before
+
+
+def summarize(name, latencies, calls):
+    row = [f"{name:<22}"]
+    for generic in (True, False):
+        values = latencies[generic]
+        row.append(f"{'generic' if generic else 'specific'} p50 {statistics.median(values):7.1f} ms")
+    row.append(f"Bedrock calls {calls}")
+    print("  ".join(row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query latency with and without precomputed snapshot summaries.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pairs", type=int, default=30)
+    parser.add_argument("--generic-share", type=float, default=0.6)
+    parser.add_argument("--scale", type=float, default=0.01, help="fraction of modeled Bedrock latency to sleep")
+    args = parser.parse_args()
+
+    snapshot_dir = tempfile.mkdtemp(prefix="snapshots-")
+    server, base_url = start_mock_newsapi(latency=0.05)
+    os.environ["NEWS_API_URL"] = base_url
+    os.environ["SNAPSHOT_DIR"] = snapshot_dir
+    import aws_clients
+    import hquery
+    import news_prefetch
+    import tracing
+
+    logging.getLogger().setLevel(logging.WARNING)
+    tracing.TRACE_SAMPLE_RATE = 0
+    tracing.TRACE_SLOW_MS = float("inf")
+    # Leave the answer cache out so every query shows its own cost
+    hquery.answer_cache.threshold = float("inf")
+
+    with mock_aws():
+        aws_clients.reset()
+        aws_clients.client("s3").create_bucket(Bucket=hquery.INPUT_BUCKET)
+        fake = install_fake_bedrock(FakeBedrockRuntime(scale=args.scale))
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            # Learn the weights, then build snapshots and their summaries
+            is_generic = hquery.is_generic_query
+            replay(hquery, fake, query_stream(hquery, args.requests, args.pairs, args.generic_share, seed=1), is_generic)
+            hquery.snapshots.flush_counts()
+            first = news_prefetch.run_prefetch(hquery.snapshots, budget=2 * args.pairs, rate=100)
+
+            queries = query_stream(hquery, args.requests, args.pairs, args.generic_share, seed=2)
+            # Baseline: same snapshots, but every query goes to Bedrock
+            hquery.is_generic_query = lambda query: False
+            llm_latencies, llm_calls = replay(hquery, fake, queries, is_generic)
+            hquery.is_generic_query = is_generic
+            precomputed_latencies, precomputed_calls = replay(hquery, fake, queries, is_generic)
+
+            # Refresh the same pairs again: the mock serves the same articles, so no summary is regenerated
+            news_prefetch.PREFETCH_MIN_AGE = 0
+            news_prefetch.PRIOR_WEIGHT = 0
+            second = news_prefetch.run_prefetch(hquery.snapshots, budget=first["requests"], rate=100)
+            hquery.archive_executor.submit(lambda: None).result()
+    server.shutdown()
+
+    generic = sum(is_generic(query) for query in queries)
+    print(f"{args.requests} queries over {args.pairs} pairs, {generic} generic")
+    print(f"prefetch run 1: {first['refreshed']} snapshots, {first['summarized']} summaries generated")
+    summarize("snapshot + Bedrock", llm_latencies, llm_calls)
+    summarize("precomputed summaries", precomputed_latencies, precomputed_calls)
+    print(f"prefetch run 2 (articles unchanged): {second['refreshed']} snapshots, "
+          f"{second['refreshed'] - second['summarized']} summaries reused, {second['summarized']} generated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import math
+import re
+
+# Rough tokens-per-character ratio for Llama-family tokenizers on English news
+CHARS_PER_TOKEN = 4
+NEAR_DUPLICATE_THRESHOLD = 0.8  # Jaccard similarity of title words
+
+STOPWORDS = {
+    "a", "an", "and", "are", "about", "any", "at", "by", "for", "from", "give",
+    "happening", "headlines", "in", "is", "latest", "me", "news", "of", "on",
+    "or", "the", "to", "today", "top", "what", "whats", "with",
+}
+# Letters and digits in any script, so non-English headlines tokenize too
+WORD_PATTERN = re.compile(r"[^\W_]+")
+# NewsAPI appends " - Source Name" to most titles
+SOURCE_SUFFIX_PATTERN = re.compile(r"\s+[-|]\s+[^-|]+$")
+
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate; good enough for budgeting without a tokenizer.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def words(text):
+    return WORD_PATTERN.findall(text.lower())
+
+
+def usable_articles(articles):
+    """
+    Drop articles NewsAPI returns without a title or description, including
+    the "[Removed]" placeholders.
+    """
+    kept = []
+    for article in articles:
+        title = (article.get("title") or "").strip()
+        description = (article.get("description") or "").strip()
+        if not title or not description or title == "[Removed]":
+            continue
+        kept.append((title, description))
+    return kept
+
+
+def dedupe_articles(articles):
+    """
+    Keep the first of every group of near-identical headlines, the same story
+    syndicated by several outlets.
+    """
+    kept = []
+    seen = []
+    for title, description in articles:
+        signature = set(words(SOURCE_SUFFIX_PATTERN.sub("", title)))
+        if not signature:
+            # Nothing to compare (a title of only punctuation or emoji): keep it
+            kept.append((title, description))
+            continue
+        duplicate = False
+        for other in seen:
+            if len(signature & other) / len(signature | other) >= NEAR_DUPLICATE_THRESHOLD:
+                duplicate = True
+                break
+        if not duplicate:
+            seen.append(signature)
+            kept.append((title, description))
+    return kept
+
+
+def rank_articles(query, articles):
+    """
+    Order articles by how many query terms they mention; ties keep NewsAPI's
+    order, which is newest first.
+    """
+    terms = set(words(query)) - STOPWORDS
+    if not terms:
+        return list(articles)
+
+    def score(item):
+        index, (title, description) = item
+        title_words = set(words(title))
+        text_words = title_words | set(words(description))
+        return (-(2 * len(terms & title_words) + len(terms & text_words)), index)
+
+    return [article for _, article in sorted(enumerate(articles), key=score)]
+
+
+def build_context(query, articles, token_budget):
+    """
+    Turn NewsAPI articles into "title: description" lines: nulls dropped,
+    near-duplicates removed, most relevant first, stopping at the token budget.
+    """
+    lines = []
+    used = 0
+    for title, description in rank_articles(query, dedupe_articles(usable_articles(articles))):
+        line = f"{title}: {description}"
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            continue
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
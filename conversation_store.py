@@ -0,0 +1,149 @@
+import threading
+from collections import OrderedDict
+
+from context_builder import CHARS_PER_TOKEN, estimate_tokens
+
+
+class Conversation:
+    """
+    One chat session: the page being discussed, the content of each page
+    (kept once, not per turn), a running summary of compacted older turns
+    and the question/answer turns since then.
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.current_page = ''
+        self.pages = {}
+        self.saved_pages = set()  # pages whose content is already in chatHistory
+        self.turns = []
+        self.memory = ''
+        self.compacted_through = 0  # timestamp of the last turn folded into memory
+        self.compacting = False
+        self.discarded = False  # the session was deleted; nothing more may be stored for it
+        self.lock = threading.Lock()
+
+    def set_page(self, page_url, page_content):
+        self.current_page = page_url
+        if page_content or page_url not in self.pages:
+            self.pages[page_url] = page_content
+
+    def add_turn(self, question, answer, max_turns, timestamp=0):
+        with self.lock:
+            self.turns.append((self.current_page, question, answer, timestamp))
+            del self.turns[:-max_turns]
+            self.forget_pages()
+
+    def forget_pages(self):
+        """
+        Drop content of pages that neither a turn nor the current page refers to.
+        """
+        live = {turn[0] for turn in self.turns}
+        live.add(self.current_page)
+        for page in list(self.pages):
+            if page not in live:
+                del self.pages[page]
+
+    def turn_tokens(self):
+        return sum(estimate_tokens(turn[1]) + estimate_tokens(turn[2]) for turn in self.turns)
+
+    def start_compaction(self, threshold, keep_recent):
+        """
+        If the turns outgrew threshold tokens and no compaction is running,
+        claim every turn but the last keep_recent for summarizing and
+        return them; otherwise return None.
+        """
+        with self.lock:
+            if self.compacting or self.turn_tokens() <= threshold or len(self.turns) <= keep_recent:
+                return None
+            self.compacting = True
+            return list(self.turns[:-keep_recent])
+
+    def finish_compaction(self, compacted_turns, memory):
+        """
+        Replace the summarized turns with the new memory. memory is None when
+        summarizing failed, in which case the turns are kept.
+        """
+        with self.lock:
+            if memory is not None:
+                compacted = {id(turn) for turn in compacted_turns}
+                self.turns = [turn for turn in self.turns if id(turn) not in compacted]
+                self.memory = memory
+                self.compacted_through = max(turn[3] for turn in compacted_turns)
+                self.forget_pages()
+            self.compacting = False
+
+    def discard(self):
+        """
+        Mark the session deleted. Taking the lock waits out a compaction
+        that is storing its memory right now.
+        """
+        with self.lock:
+            self.discarded = True
+
+    def build_prompt(self, question, turn_budget, page_budget):
+        """
+        Current page content (trimmed to page_budget tokens), the memory of
+        earlier turns, then as many of the most recent turns as fit in
+        turn_budget tokens, then the question.
+        """
+        page_content = self.pages.get(self.current_page, '')
+        if estimate_tokens(page_content) > page_budget:
+            page_content = page_content[:page_budget * CHARS_PER_TOKEN]
+
+        memory = f"Earlier in this conversation: {self.memory}" if self.memory else ''
+        window = []
+        used = estimate_tokens(question) + estimate_tokens(memory)
+        for _, past_question, past_answer, _ in reversed(self.turns):
+            cost = estimate_tokens(past_question) + estimate_tokens(past_answer)
+            if used + cost > turn_budget:
+                break
+            window.append(f"{past_question}\n{past_answer}")
+            used += cost
+        window.reverse()
+
+        parts = [page_content] if page_content else []
+        if memory:
+            parts.append(memory)
+        parts.extend(window)
+        parts.append(question)
+        return "\n".join(parts)
+
+
+class ConversationStore:
+    """
+    In-memory LRU of conversations for a warm container. On a miss the
+    conversation is rebuilt by loader(session_id), e.g. from the chatHistory
+    table, which may return None for a brand new session.
+    """
+
+    def __init__(self, loader=None, max_sessions=256, max_turns=50):
+        self.loader = loader
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is not None:
+                self._sessions.move_to_end(session_id)
+                return conversation
+        conversation = self.loader(session_id) if self.loader else None
+        if conversation is None:
+            conversation = Conversation(session_id)
+        with self._lock:
+            # Another request may have loaded it meanwhile; keep the first one
+            conversation = self._sessions.setdefault(session_id, conversation)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return conversation
+
+    def discard(self, session_id):
+        with self._lock:
+            conversation = self._sessions.pop(session_id, None)
+        if conversation is not None:
+            conversation.discard()
+        return conversation
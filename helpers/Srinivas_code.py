@@ -1,39 +1,186 @@
-from PIL import Image
 import logging
-import boto3
 import json
-import requests
 import base64
 from botocore.exceptions import ClientError
-from io import BytesIO
 import time
 import uuid
+import os
 from boto3.dynamodb.conditions import Key
 import io
+from concurrent.futures import ThreadPoolExecutor
+# aws_clients.py, image_cache.py, http_session.py, conversation_store.py and history_writer.py are packaged next to this handler in the Lambda zip
+import aws_clients
+import image_cache
+from conversation_store import Conversation, ConversationStore
+from history_writer import HistoryWriter
 
 
-# Initialize the Bedrock client
-bedrock_runtime = boto3.client(
-    service_name='bedrock-runtime',
-    region_name='us-east-1'
-)
-
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-table = dynamodb.Table('chatHistory')
+TABLE_NAME = 'chatHistory'
+DELETE_WORKERS = 4
 
+# Parallel batch deletes for delete_chat_history
+delete_executor = ThreadPoolExecutor(max_workers=DELETE_WORKERS)
 
 MODEL_ID = "us.meta.llama3-2-90b-instruct-v1:0"  # The Llama model ID
 
-# URL for the image you want to send to the model
-currentPage =''
-p = ''
-def newPage(pageURL):
-    global currentPage
-    currentPage = pageURL
+# Conversation window sent to the model, in estimated tokens
+TURN_TOKEN_BUDGET = 3000
+PAGE_TOKEN_BUDGET = 4000
+MAX_TURNS = 50
+# Older turns are summarized into a memory block once the turns pass this size
+COMPACT_AFTER_TOKENS = 2500
+KEEP_RECENT_TURNS = 2
+MEMORY_TIMESTAMP = 0  # sort key of the memory item in chatHistory
+# Queue chatHistory writes on history_writer instead of writing them inline.
+# Off by default: the queue is in process memory, so a turn still queued
+# when the container is reclaimed is lost.
+HISTORY_ASYNC = os.environ.get("HISTORY_ASYNC", "0") == "1"
+# How long a delete waits for queued writes before going ahead anyway
+HISTORY_FLUSH_TIMEOUT = float(os.environ.get("HISTORY_FLUSH_TIMEOUT", "5"))  # seconds
+
+# Compaction runs here, after the response has been built
+compaction_executor = ThreadPoolExecutor(max_workers=1)
+
+# chatHistory writes are queued here and batched off the request path
+history_writer = HistoryWriter(lambda: aws_clients.dynamodb_table(TABLE_NAME, region_name='us-east-1'))
+
+
+def load_conversation(session_id):
+    """
+    Rebuild a session from its most recent chatHistory items when this
+    container hasn't seen it yet.
+    """
+    table = aws_clients.dynamodb_table(TABLE_NAME, region_name='us-east-1')
+    response = table.query(
+        KeyConditionExpression=Key('sessionId').eq(session_id) & Key('timestamp').gt(MEMORY_TIMESTAMP),
+        ScanIndexForward=False,
+        Limit=MAX_TURNS
+    )
+    items = list(reversed(response['Items']))
+    if not items:
+        return None
+    conversation = Conversation(session_id)
+    memory_item = table.get_item(
+        Key={'sessionId': session_id, 'timestamp': MEMORY_TIMESTAMP}
+    ).get('Item')
+    if memory_item:
+        conversation.memory = memory_item.get('memory', '')
+        conversation.compacted_through = int(memory_item.get('compactedThrough', 0))
+    page_contents = load_pages(table, session_id)
+    conversation.saved_pages.update(page_contents)
+    for item in items:
+        timestamp = int(item['timestamp'])
+        if timestamp <= conversation.compacted_through:
+            continue
+        page_url = item.get('pageURL', '')
+        # Items written before pages were stored by reference carry their own pageContent
+        conversation.set_page(page_url, item.get('pageContent') or page_contents.get(page_url, ''))
+        conversation.add_turn(item.get('question', ''), item.get('answer', ''), MAX_TURNS, timestamp)
+    return conversation
+
+def load_pages(table, session_id):
+    """
+    pageURL -> pageContent from the session's page items.
+    """
+    pages = {}
+    query_args = {
+        'KeyConditionExpression': Key('sessionId').eq(session_id) & Key('timestamp').lt(MEMORY_TIMESTAMP),
+        'ProjectionExpression': 'pageURL, pageContent',
+    }
+    while True:
+        response = table.query(**query_args)
+        for item in response['Items']:
+            pages[item.get('pageURL', '')] = item.get('pageContent', '')
+        if 'LastEvaluatedKey' not in response:
+            return pages
+        query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def save_turn(conversation, item, page_content):
+    """
+    Persist a turn. The page content goes into its own item the first time
+    the session asks about that page; turns only carry the pageURL.
+    """
+    items = []
+    page_url = item['pageURL']
+    if page_url not in conversation.saved_pages and page_content:
+        # Turns have positive sort keys; page items (content stored once per
+        # page) have the negated time the page was first seen
+        items.append({
+            'sessionId': item['sessionId'],
+            'timestamp': -item['timestamp'],
+            'pageURL': page_url,
+            'pageContent': page_content
+        })
+        conversation.saved_pages.add(page_url)
+    items.append(item)
+    if HISTORY_ASYNC:
+        for entry in items:
+            history_writer.put(entry)
+    else:
+        # One BatchWriteItem for the page and turn; batch_writer resends any
+        # unprocessed items before the with block returns
+        table = aws_clients.dynamodb_table(TABLE_NAME, region_name='us-east-1')
+        with table.batch_writer() as writer:
+            for entry in items:
+                writer.put_item(Item=entry)
+
+def schedule_compaction(conversation):
+    """
+    Queue a summary of the session's older turns if it has grown past
+    COMPACT_AFTER_TOKENS. The next turns pick up the new memory block.
+    """
+    turns = conversation.start_compaction(COMPACT_AFTER_TOKENS, KEEP_RECENT_TURNS)
+    if turns:
+        return compaction_executor.submit(compact_conversation, conversation, turns)
+    return None
+
+def compact_conversation(conversation, turns):
+    """
+    Fold turns and the previous memory into a new memory block with Bedrock
+    and store it next to the session's chatHistory items.
+    """
+    memory = None
+    try:
+        if conversation.discarded:
+            return
+        transcript = "\n".join(f"User: {turn[1]}\nAssistant: {turn[2]}" for turn in turns)
+        prompt = (
+            "Summarize this conversation between a user and an assistant about news articles "
+            "in under 150 words. Keep names, facts and any open questions.\n"
+        )
+        if conversation.memory:
+            prompt += f"Summary so far: {conversation.memory}\n"
+        prompt += f"Conversation:\n{transcript}"
+        bedrock_runtime = aws_clients.client('bedrock-runtime', region_name='us-east-1')
+        response = bedrock_runtime.converse(
+            modelId=MODEL_ID,
+            messages=[{"role": "user", "content": [{"text": prompt}]}]
+        )
+        memory = response['output']['message']['content'][0]['text']
+
+        table = aws_clients.dynamodb_table(TABLE_NAME, region_name='us-east-1')
+        # Held across the write so a delete either sees the memory item or
+        # has already marked the session discarded
+        with conversation.lock:
+            if conversation.discarded:
+                memory = None
+                return
+            table.put_item(
+                Item={
+                    'sessionId': conversation.session_id,
+                    'timestamp': MEMORY_TIMESTAMP,
+                    'memory': memory,
+                    'compactedThrough': max(turn[3] for turn in turns)
+                }
+            )
+    except Exception as e:
+        print(f"Compaction error: {str(e)}")
+        memory = None
+    finally:
+        conversation.finish_compaction(turns, memory)
 
-def promptUpdate(data):
-    global p
-    p = p + data
+# Per-session conversations, kept across warm invocations
+conversations = ConversationStore(loader=load_conversation, max_turns=MAX_TURNS)
 
 
 def lambda_handler(event, context):
@@ -47,6 +194,11 @@ def lambda_handler(event, context):
     # print(action)
     if action == 'delete':
         print("Delete session ID", session_id)
+        # Also stops a queued or running compaction from storing its memory afterwards
+        conversations.discard(session_id)
+        # Queued writes for this session would otherwise land after the delete
+        if not history_writer.flush(HISTORY_FLUSH_TIMEOUT):
+            print(f"History writes still queued after {HISTORY_FLUSH_TIMEOUT} s, deleting anyway")
         result = delete_chat_history(session_id)
         return {
             'statusCode': 200,
@@ -69,111 +221,36 @@ def lambda_handler(event, context):
     #     print(pageURL)
         # print(session_id)
         try:
-            if currentPage != pageURL:
-                promptUpdate(pageContent)
-                promptUpdate(prompt)
-                #print(p)
-                if ImageURL == '': 
-                    messages = [
-                        {
-                        "role": "user",
-                        "content": [{"text": p}]
-                        }
-                    ]
-
-                else:
-                    imageData = requests.get(ImageURL).content
-                    print("read image data")
-
-                    byteImgIO = BytesIO(imageData)
-                    image = Image.open(byteImgIO)
-
-                    # image = Image.open(BytesIO(imageData))
-                    width, height = image.size
-                    format = image.format
-                    print("format", format)
-                    # Check if the image exceeds the resolution limit
-                    if max(width, height) > 1120:
-                        # Determine the scaling factor to make the longer side 1120 pixels
-                        scaling_factor = 1120 / max(width, height)
-                        new_width = int(width * scaling_factor)
-                        new_height = int(height * scaling_factor)
-                        
-                        # Resize the image
-                        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                        imageData = BytesIO()
-                        image.save(imageData, format=format)  # Formats like 'JPEG' require uppercase
-                        imageData.seek(0)
-                        imageData = imageData.getvalue()
-                    format = format.lower()
-                    messages = [    
-                {
-                    "role": "user",
-                    "content": [
-                        {                
-                            "text": p
-                        },
-                        {                
-                            "image": {
-                                "format": format,
-                                "source": {
-                                    "bytes":imageData
+            conversation = conversations.get(session_id)
+            if conversation.current_page != pageURL:
+                conversation.set_page(pageURL, pageContent)
+            p = conversation.build_prompt(prompt, TURN_TOKEN_BUDGET, PAGE_TOKEN_BUDGET)
+            #print(p)
+            content = [{"text": p}]
+            if ImageURL != '':
+                try:
+                    # Fetch, resize and cache the image (reused across turns)
+                    imageData, format = image_cache.load_image(ImageURL)
+                    print("read image data, format", format)
+                    content.append({
+                        "image": {
+                            "format": format,
+                            "source": {
+                                "bytes": imageData
                             }
-                            }}
-                        ]
-                    }
-                ]
-                newPage(pageURL)
-            else:
-                promptUpdate(prompt)
-                #print(p)
-                if ImageURL == '': 
-                    messages = [
-                        {
-                        "role": "user",
-                        "content": [{"text": p}]
                         }
-                        ]
-                #currentPage = pageURL
-                else:
-                    imageData = requests.get(ImageURL).content
-                    print('Image data:')
-                    image = Image.open(BytesIO(imageData))
-                    width, height = image.size
-                    format = image.format
-                    print("format: ", format)
-                    # Check if the image exceeds the resolution limit
-                    if max(width, height) > 1120:
-                        # Determine the scaling factor to make the longer side 1120 pixels
-                        scaling_factor = 1120 / max(width, height)
-                        new_width = int(width * scaling_factor)
-                        new_height = int(height * scaling_factor)
-                        
-                        # Resize the image
-                        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                        imageData = BytesIO()
-                        image.save(imageData, format=format)  # Formats like 'JPEG' require uppercase
-                        imageData.seek(0)
-                        imageData = imageData.getvalue()
-                    format = format.lower()
-                    messages = [    
+                    })
+                except image_cache.ImageRejected as e:
+                    # Answer from the page text alone rather than failing the turn
+                    print(f"Skipping image: {str(e)}")
+            messages = [
                 {
-                    "role": "user",
-                    "content": [
-                        {                
-                            "text": p
-                        },
-                        {                
-                            "image": {
-                                "format": format,
-                                "source": {
-                                    "bytes":imageData
-                            }
-                            }}
-                        ]
-                    }
-                ]
-                #     # Call the Bedrock Converse API
+                "role": "user",
+                "content": content
+                }
+            ]
+            # Call the Bedrock Converse API
+            bedrock_runtime = aws_clients.client('bedrock-runtime', region_name='us-east-1')
             response = bedrock_runtime.converse(
                 modelId=MODEL_ID,
                 messages=messages
@@ -181,19 +258,18 @@ def lambda_handler(event, context):
             
             # Extract the response content
             generated_text = response['output']['message']['content'][0]['text']
-            promptUpdate(generated_text)
+            conversation.add_turn(prompt, generated_text, MAX_TURNS, timestamp)
 
-            table.put_item(
-                Item={
-                    'sessionId': session_id,
-                    'timestamp': timestamp,
-                    'question': prompt,
-                    'answer': generated_text,
-                    'ImageURL': ImageURL,
-                    'pageURL': pageURL,
-                    'pageContent': pageContent
-                }            
-            )
+            save_turn(conversation, {
+                'sessionId': session_id,
+                'timestamp': timestamp,
+                'question': prompt,
+                'answer': generated_text,
+                'ImageURL': ImageURL,
+                'pageURL': pageURL
+            }, conversation.pages.get(pageURL, ''))
+
+            schedule_compaction(conversation)
 
             # Construct the response to return to the client
             return {
@@ -212,22 +288,42 @@ def delete_chat_history(session_id):
     print("delete chat history function")
     try:
         print("inside try")
-        # Scan for items with the given session_id
-        response = table.scan(
-            FilterExpression=Key('sessionId').eq(session_id)
-        )
-        items = response['Items']
-        # print(session_id)
+        table = aws_clients.dynamodb_table(TABLE_NAME, region_name='us-east-1')
+        # Query the session's partition page by page, fetching only the key
+        # attributes, and hand each page to a delete worker as it arrives
+        futures = []
+        query_args = {
+            'KeyConditionExpression': Key('sessionId').eq(session_id),
+            'ProjectionExpression': 'sessionId, #ts',
+            'ExpressionAttributeNames': {'#ts': 'timestamp'},  # timestamp is a reserved word
+        }
+        while True:
+            response = table.query(**query_args)
+            keys = response['Items']
+            if keys:
+                futures.append(delete_executor.submit(delete_keys, keys))
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
 
-        # Delete each item
-        with table.batch_writer() as batch:
-            for item in items:
-                batch.delete_item(
-                    Key={
-                        'sessionId': item['sessionId'],
-                        'timestamp': item['timestamp']
-                    }
-                )
-        return f"Deleted {len(items)} items for session {session_id}."
+        deleted = sum(future.result() for future in futures)
+        return f"Deleted {deleted} items for session {session_id}."
     except Exception as e:
         return f"Error deleting items: {str(e)}"
+
+def delete_keys(keys):
+    """
+    Delete one page of keys. batch_writer groups them into 25-item
+    BatchWriteItem calls and resubmits any UnprocessedItems until they go
+    through. Runs on a delete worker, which uses its own Table handle.
+    """
+    table = aws_clients.dynamodb_table(TABLE_NAME, region_name='us-east-1')
+    with table.batch_writer() as batch:
+        for key in keys:
+            batch.delete_item(
+                Key={
+                    'sessionId': key['sessionId'],
+                    'timestamp': key['timestamp']
+                }
+            )
+    return len(keys)
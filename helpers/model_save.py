@@ -1,4 +1,5 @@
 import json
+import os
 from transformers import pipeline
 import torch
 
@@ -14,3 +15,8 @@ model.save_pretrained('./model')
 
 # Optionally save the tokenizer (you will need this later to use the model again)
 tokenizer.save_pretrained('./tokenizer')
+
+# EXPORT_ONNX=1 also writes ./onnx/model.onnx and the int8 ./onnx/model.int8.onnx
+if os.environ.get('EXPORT_ONNX') == '1':
+    from onnx_export import export_onnx
+    export_onnx(model, './onnx')
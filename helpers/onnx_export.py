@@ -0,0 +1,49 @@
+import os
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import AutoModelForQuestionAnswering
+
+
+class QALogits(torch.nn.Module):
+    """
+    Wraps a QA model so the export has plain (start_logits, end_logits) outputs.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        output = self.model(input_ids=input_ids, attention_mask=attention_mask)
+        return output.start_logits, output.end_logits
+
+
+def export_onnx(model, output_dir='./onnx'):
+    """
+    Write output_dir/model.onnx (fp32) and output_dir/model.int8.onnx with
+    dynamically quantized int8 weights, for QA_BACKEND=onnx in inference.py.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, 'model.onnx')
+    int8_path = os.path.join(output_dir, 'model.int8.onnx')
+    model = model.to('cpu').eval()
+    dummy = torch.ones((1, 16), dtype=torch.long)
+    with torch.no_grad():
+        torch.onnx.export(
+            QALogits(model),
+            (dummy, dummy),
+            fp32_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['start_logits', 'end_logits'],
+            dynamic_axes={name: {0: 'batch', 1: 'sequence'} for name in ('input_ids', 'attention_mask', 'start_logits', 'end_logits')},
+            opset_version=14,
+        )
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"ONNX model saved to {fp32_path}, int8 model to {int8_path}")
+    return fp32_path, int8_path
+
+
+if __name__ == '__main__':
+    # Export a model already saved by model_save.py / roberta_model_save.py
+    export_onnx(AutoModelForQuestionAnswering.from_pretrained('./model'))
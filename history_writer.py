@@ -0,0 +1,129 @@
+import logging
+import queue
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+_LOG = logging.getLogger()
+
+# Errors that fail the same way however often the item is retried
+PERMANENT_ERRORS = {"ValidationException", "ItemCollectionSizeLimitExceededException"}
+
+
+class HistoryWriter:
+    """
+    Background writer for DynamoDB items. put() only queues the item; a
+    daemon thread drains the queue in batch_writer batches.
+
+    A batch that fails is retried item by item, so one bad item (say a
+    pageContent over DynamoDB's 400 KB limit) can't hold the rest back.
+    An item is retried at most max_attempts times, and not at all after a
+    ValidationException; then it is dropped and logged with its key.
+
+    Delivery is best effort. The queue lives in process memory: items
+    still queued when Lambda freezes the container are written when it
+    thaws, but are lost if the container is reclaimed first, normally a
+    window of about interval seconds after each put().
+    """
+
+    def __init__(self, get_table, batch_size=25, interval=0.2, retry_delay=1.0, max_attempts=3):
+        self.get_table = get_table
+        self.batch_size = batch_size
+        self.interval = interval  # seconds to wait for a batch to fill up
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.written = 0
+        self.failures = 0
+        self.dropped = 0
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        with self._idle:
+            self._pending += 1
+        self._queue.put((item, 0))
+        self.start()
+
+    def start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self.run, name="history-writer", daemon=True)
+                    self._thread.start()
+
+    def run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.write([item for item, _ in batch])
+            except Exception as e:
+                print(f"History batch write failed, writing {len(batch)} items one by one: {str(e)}")
+                self.failures += 1
+                self.write_each(batch)
+                continue
+            self.done(len(batch), 0)
+
+    def write(self, batch):
+        table = self.get_table()
+        with table.batch_writer(overwrite_by_pkeys=['sessionId', 'timestamp']) as writer:
+            for item in batch:
+                writer.put_item(Item=item)
+
+    def write_each(self, batch):
+        """
+        Write a failed batch one item at a time. Items that fail again go
+        back on the queue until they run out of attempts.
+        """
+        table = self.get_table()
+        written = dropped = 0
+        retry = []
+        for item, attempts in batch:
+            try:
+                table.put_item(Item=item)
+                written += 1
+                continue
+            except ClientError as e:
+                error, permanent = e, e.response.get("Error", {}).get("Code") in PERMANENT_ERRORS
+            except Exception as e:
+                error, permanent = e, False
+            if permanent or attempts + 1 >= self.max_attempts:
+                _LOG.error(
+                    f"Dropping chatHistory item sessionId={item.get('sessionId')} "
+                    f"timestamp={item.get('timestamp')} after {attempts + 1} attempts: {error}"
+                )
+                dropped += 1
+            else:
+                retry.append((item, attempts + 1))
+        self.done(written, dropped)
+        if retry:
+            time.sleep(self.retry_delay)
+            for entry in retry:
+                self._queue.put(entry)
+
+    def done(self, written, dropped):
+        with self._idle:
+            self._pending -= written + dropped
+            self.written += written
+            self.dropped += dropped
+            self._idle.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Block until every queued item is written or dropped. Returns False
+        on timeout.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
@@ -1,9 +1,20 @@
-import boto3
 import json
 import logging
 import requests
 import re
+import os
 import datetime
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import aws_clients
+import http_session
+import tracing
+from answer_cache import AnswerCache, query_signature
+from archive_index import ArchiveIndex
+from context_builder import STOPWORDS, WORD_PATTERN, build_context
+from news_cache import MemoryCache, SQLiteCache, TieredCache, make_cache_key
+from news_snapshots import SnapshotStore
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 _LOG = logging.getLogger()
@@ -20,6 +31,58 @@ ROLE_ARN = ""
 HUGGINGFACE_IMAGE_URI = ""
 # NewsAPI key
 NEWS_API_KEY = ""
+NEWS_API_URL = os.environ.get("NEWS_API_URL", "https://newsapi.org/v2")
+NEWS_API_TIMEOUT = float(os.environ.get("NEWS_API_TIMEOUT", "5"))  # seconds, per request
+# Issue top-headlines and everything together when we can't predict which one works
+NEWS_SPECULATIVE = os.environ.get("NEWS_SPECULATIVE", "1") == "1"
+HINT_MIN_SAMPLES = 3
+HINT_MIN_SHARE = 0.8
+HINT_WINDOW = 20  # hints are forgotten after this many answers and re-learned
+
+# NewsAPI response cache: in-process tier plus an optional shared SQLite tier
+NEWS_CACHE_TTL = int(os.environ.get("NEWS_CACHE_TTL", "300"))  # seconds
+NEWS_CACHE_SIZE = int(os.environ.get("NEWS_CACHE_SIZE", "128"))
+NEWS_CACHE_DB = os.environ.get("NEWS_CACHE_DB", "")  # e.g. /tmp/news_cache.sqlite3
+
+# Answer cache: reuse a summary for a similar query on the same country/category
+ANSWER_CACHE_TTL = int(os.environ.get("ANSWER_CACHE_TTL", str(NEWS_CACHE_TTL)))  # seconds
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.75"))
+
+# Prefetched news snapshots (news_prefetch.py), read instead of calling
+# NewsAPI while younger than SNAPSHOT_MAX_AGE. Off unless a bucket or directory is set.
+SNAPSHOT_BUCKET = os.environ.get("SNAPSHOT_BUCKET", "")
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "")  # e.g. /mnt/efs/snapshots for local runs
+SNAPSHOT_MAX_AGE = int(os.environ.get("SNAPSHOT_MAX_AGE", "900"))  # seconds
+# Words that don't change what a "news in <country>" query asks for; a query
+# made only of these, stopwords and its country/category gets the snapshot's
+# precomputed summary
+GENERIC_WORDS = {
+    "new", "recent", "current", "stories", "story", "updates", "update", "breaking",
+    "trending", "events", "tell", "show", "this", "week", "now", "there", "going",
+}
+
+# Upper bound on the article context sent to Bedrock
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "1500"))
+
+# Local embedding index (article_index.py): the prompt carries only the
+# RELEVANT_ARTICLES articles closest to the whole query. Needs numpy and
+# sentence-transformers in the image, so it is off unless ARTICLE_INDEX=1.
+ARTICLE_INDEX = os.environ.get("ARTICLE_INDEX", "0") == "1"
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+RELEVANT_ARTICLES = int(os.environ.get("RELEVANT_ARTICLES", "5"))
+ARTICLE_INDEX_DIR = os.environ.get("ARTICLE_INDEX_DIR", "")  # e.g. /tmp/article_index, kept across requests
+# A save rewrites the whole index, so it runs after this many new embeddings,
+# or this long after the last save if anything is unsaved, whichever is first
+ARTICLE_INDEX_SAVE_EVERY = int(os.environ.get("ARTICLE_INDEX_SAVE_EVERY", "1000"))
+ARTICLE_INDEX_SAVE_SECONDS = float(os.environ.get("ARTICLE_INDEX_SAVE_SECONDS", "600"))
+
+# Full-text index over the archived news/ files, built by archive_indexer.py.
+# Queries naming no country or category are answered from it when set.
+ARCHIVE_INDEX_DB = os.environ.get("ARCHIVE_INDEX_DB", "")  # e.g. /mnt/efs/archive_index.sqlite3
+ARCHIVE_RESULTS = int(os.environ.get("ARCHIVE_RESULTS", "10"))  # articles passed on to the prompt
+# Share of the query's terms an archived article must contain to be used;
+# below it the query is rejected as before rather than answered off-topic
+ARCHIVE_MIN_MATCH = float(os.environ.get("ARCHIVE_MIN_MATCH", "0.6"))
 
 # Supported countries and categories
 COUNTRIES = {
@@ -80,43 +143,189 @@ COUNTRIES = {
 }
 CATEGORIES = ['politics', 'finance', 'technology', 'sports', 'entertainment', 'health']
 
+# Extra spellings that map onto a key of COUNTRIES / an entry of CATEGORIES
+COUNTRY_ALIASES = {
+    "usa": "united states",
+    "america": "united states",
+    "american": "united states",
+    "united states of america": "united states",
+    "uk": "united kingdom",
+    "britain": "united kingdom",
+    "great britain": "united kingdom",
+    "british": "united kingdom",
+    "england": "united kingdom",
+    "indian": "india",
+    "chinese": "china",
+    "japanese": "japan",
+    "korea": "south korea",
+    "german": "germany",
+    "french": "france",
+    "italian": "italy",
+    "russian": "russia",
+    "australian": "australia",
+    "canadian": "canada",
+    "mexican": "mexico",
+    "brazilian": "brazil",
+    "emirates": "uae",
+    "united arab emirates": "uae",
+    "venezuela": "venuzuela",
+}
+CATEGORY_ALIASES = {
+    "political": "politics",
+    "election": "politics",
+    "elections": "politics",
+    "financial": "finance",
+    "business": "finance",
+    "economy": "finance",
+    "market": "finance",
+    "markets": "finance",
+    "tech": "technology",
+    "sport": "sports",
+    "movies": "entertainment",
+    "music": "entertainment",
+    "medical": "health",
+}
+
+
+SHORT_KEYWORD_LENGTH = 3
+
+
+def build_keyword_matcher():
+    """
+    Compile every country, category and alias into one regex anchored at a
+    word start.
+    The phrases are folded into a character trie so the regex engine never
+    retries alternatives that share a prefix ("united kingdom"/"united states").
+    """
+    lookup = {}
+    for country in COUNTRIES:
+        lookup[country] = ("country", country)
+    for alias, country in COUNTRY_ALIASES.items():
+        lookup[alias] = ("country", country)
+    for category in CATEGORIES:
+        lookup[category] = ("category", category)
+    for alias, category in CATEGORY_ALIASES.items():
+        lookup[alias] = ("category", category)
+
+    # Country and category names match with any suffix ("chinas",
+    # "healthcare"), as the old substring loop did. Aliases and short names
+    # take at most a plural "s" ("indians", not "technique" for "tech").
+    tries = ({}, {})
+    for phrase, (_, name) in lookup.items():
+        inflected = phrase == name and len(phrase) > SHORT_KEYWORD_LENGTH
+        node = tries[0 if inflected else 1]
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    pattern = re.compile(rf"\b(?:({trie_to_regex(tries[0])})\w*|({trie_to_regex(tries[1])})s?\b)")
+    return pattern, lookup
+
+def keyword_of(match):
+    """
+    The lookup key a KEYWORD_PATTERN match stands for, without any suffix.
+    """
+    # Matched text may span a run of whitespace, lookup keys use single spaces
+    return " ".join((match.group(1) or match.group(2)).split())
+
+def trie_to_regex(node):
+    """
+    Render a character trie as a regex. Optional suffixes stay greedy, so
+    the longest phrase wins ("american" over "america").
+    """
+    ends_here = "" in node
+    branches = []
+    for char, child in sorted(node.items()):
+        if char == "":
+            continue
+        token = r"\s+" if char == " " else re.escape(char)
+        branches.append(token + trie_to_regex(child))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if ends_here:
+        return f"(?:{body})?"
+    return body
+
+KEYWORD_PATTERN, KEYWORD_LOOKUP = build_keyword_matcher()
 
-# Initialize the Bedrock client
-bedrock_runtime = boto3.client(
-    service_name='bedrock-runtime',
-    region_name='us-east-1'
-)
 
 MODEL_ID = "us.meta.llama3-2-90b-instruct-v1:0"  # The Llama model ID
 
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "*",
+    "Access-Control-Allow-Headers": "*"
+}
 
-def lambda_handler(event, context):
-    try:
-        # Parse input query
-        print(f"Event: {event}, time: {datetime.datetime.now()}")
-        query = event.get("queryStringParameters", {}).get("q")
-        if not query:
-            return create_response(400, {"error": "No query provided"})
+# Single background worker that archives news to S3 off the request path
+archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="s3-archive")
 
-        print(f"Received query: {query}, time: {datetime.datetime.now()}")
+# Saves of the embedding index, kept off archive_executor so a slow save
+# doesn't hold up S3 archiving
+index_save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-save")
 
-        # Extract country and category
-        country, category = extract_keywords_simple(query)
-        print(f"Country: {country} and Category: {category}")
-        if not (country or category):
-            return create_response(400, {"error": "Invalid country or category in query"})
+# Worker pool for the speculative top-headlines/everything fan-out
+fetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="newsapi")
+
+# (country, category) -> Counter of which endpoint ended up serving the answer
+ENDPOINT_HINTS = {}
+
+answer_cache = AnswerCache(ttl=ANSWER_CACHE_TTL, threshold=ANSWER_CACHE_THRESHOLD)
+
+news_cache = TieredCache(
+    MemoryCache(max_entries=NEWS_CACHE_SIZE, ttl=NEWS_CACHE_TTL),
+    SQLiteCache(NEWS_CACHE_DB, ttl=NEWS_CACHE_TTL) if NEWS_CACHE_DB else None,
+)
+
+snapshots = SnapshotStore(bucket=SNAPSHOT_BUCKET, directory=SNAPSHOT_DIR, max_age=SNAPSHOT_MAX_AGE)
+
+archive_index = ArchiveIndex(ARCHIVE_INDEX_DB) if ARCHIVE_INDEX_DB else None
 
-        # Fetch news using the News API
-        news_data = trigger_news_api(country, category)
-        print(f"API triggered, time: {datetime.datetime.now()}")
+article_index = None
+if ARTICLE_INDEX:
+    from article_index import ArticleIndex, Embedder
+    article_index = ArticleIndex(Embedder(EMBEDDING_MODEL))
+    if ARTICLE_INDEX_DIR:
+        article_index.load(ARTICLE_INDEX_DIR)
+# When the index was last saved and how many embeddings it had then
+last_index_save = {"at": time.monotonic(), "embedded": 0, "future": None}
 
-        # Save news data to S3
-        file_name = save_news_to_s3(news_data, query)
-        print(f"Saved news, time: {datetime.datetime.now()}")
+
+def lambda_handler(event, context):
+    # One structured trace per request, logged as a JSON/EMF line (see tracing.py)
+    trace = tracing.start_trace("news_query", request_id=getattr(context, "aws_request_id", None))
+    response = handle_query(event)
+    tracing.finish_trace(trace, status=response["statusCode"])
+    return response
+
+class QueryRejected(Exception):
+    """
+    The query can't be answered (no query, or nothing to look news up by);
+    the entry points turn it into a 400.
+    """
+
+
+def handle_query(event):
+    try:
+        # Parse input query
+        print(f"Event: {event}")
+        query = event.get("queryStringParameters", {}).get("q")
+        started = time.perf_counter()
+        try:
+            summary, news_data, cache_key = prepare_summary(query)
+        except QueryRejected as e:
+            return create_response(400, {"error": str(e)})
+        if summary is not None:
+            return create_response(200, {"summary": summary})
 
         # Run inference using endpoint
-        summary = infer_with_endpoint(query, file_name)
-        print(f"Summary: {summary}, time: {datetime.datetime.now()}")
+        summary = infer_with_endpoint(query, news_data)
+        print(f"Summary: {summary}")
+        if cache_key is not None:
+            if isinstance(summary, str):
+                answer_cache.set(*cache_key, summary)
+            answer_cache.record(False, time.perf_counter() - started)
+            print(f"Answer cache stats: {answer_cache.stats()}")
 
         # Return the summary to the client
         return create_response(200, {"summary": summary})
@@ -125,85 +334,397 @@ def lambda_handler(event, context):
         _LOG.error(f"Error: {str(e)}", exc_info=True)
         return create_response(500, {"error": "Internal server error"})
 
-def extract_keywords_simple(query):
+def prepare_summary(query):
     """
-    Extract country and category keywords using basic string matching.
+    Every step before the Bedrock call, shared by handle_query and the
+    /stream endpoint (stream_app.py) so both answer a query the same way:
+    keywords, answer cache, snapshot (and its precomputed summary) or
+    NewsAPI, the archive for queries naming no country or category, and
+    the embedding index's pick of relevant articles.
+
+    Returns (summary, news_data, cache_key). summary is set when a cached
+    or precomputed answer can be sent as is. Otherwise news_data holds the
+    articles to summarize and cache_key the answer cache key to store the
+    summary under (None for archive answers). Raises QueryRejected.
     """
-    query = preprocess_query(query)
-    country = None
-    category = None
+    if not query:
+        raise QueryRejected("No query provided")
+    print(f"Received query: {query}")
 
-    for c in COUNTRIES.keys():
-        if c in query:
-            country = c
-            break
+    # Extract country and category
+    started = time.perf_counter()
+    with tracing.span("keywords"):
+        country, category = extract_keywords_simple(query)
+    tracing.annotate(country=country, category=category)
+    print(f"Country: {country} and Category: {category}")
+    if not (country or category):
+        # Nothing to ask NewsAPI for; look through the articles we archived
+        news_data = search_archive(query)
+        if news_data is None:
+            raise QueryRejected("Invalid country or category in query")
+        return None, news_data, None
 
-    for cat in CATEGORIES:
-        if cat in query:
-            category = cat
-            break
+    # Serve a recent answer to an equivalent question
+    with tracing.span("answer_cache") as span:
+        cache_key = (*answer_scope(query), answer_signature(query))
+        summary = answer_cache.get(*cache_key)
+        span["hit"] = summary is not None
+    if summary is not None:
+        answer_cache.record(True, time.perf_counter() - started)
+        print(f"Answer cache hit, stats: {answer_cache.stats()}")
+        return summary, None, cache_key
+
+    # Fetch news: a prefetched snapshot if there is a fresh one, else the News API
+    news_data = read_snapshot(country, category)
+    if news_data is not None and news_data.get("summary") and is_generic_query(query):
+        # Summarized once by the prefetch job when the snapshot changed
+        tracing.count("precomputed_summary")
+        print(f"Serving precomputed summary for {country}/{category}")
+        return news_data["summary"], None, cache_key
+    if news_data is None:
+        with tracing.span("newsapi"):
+            news_data = trigger_news_api(country, category)
+        print(f"API triggered, HTTP pool: {http_session.session_stats()}")
+        if "error" in news_data:
+            raise RuntimeError(news_data["error"])
+
+        # Archive the fresh response to S3 in the background; snapshots
+        # are already stored and would only be uploaded again
+        archive_news_async(news_data, query)
+        print("Queued news archive")
+
+    return None, relevant_news(query, news_data), cache_key
+
+def read_snapshot(country, category):
+    """
+    Return the prefetched snapshot for (country, category) if it is fresh
+    enough, else None. Also counts the query for the prefetch job's weights.
+    """
+    if not snapshots.enabled:
+        return None
+    if snapshots.record_query(country, category):
+        archive_executor.submit(snapshots.flush_counts)
+    with tracing.span("snapshot") as span:
+        try:
+            snapshot = snapshots.get(country, category)
+        except Exception as e:
+            _LOG.error(f"Error reading news snapshot: {e}")
+            snapshot = None
+        span["hit"] = snapshot is not None
+    tracing.count("snapshot_hit", int(snapshot is not None))
+    if snapshot is not None:
+        tracing.annotate(snapshot_age_s=round(time.time() - snapshot["fetchedAt"], 1))
+        print(f"Snapshot hit for {country}/{category}, stats: {snapshots.stats()}")
+    return snapshot
+
+def search_archive(query):
+    """
+    The archived articles that best match the query, shaped like a NewsAPI
+    response, or None when the index is off or nothing matches well enough.
+    Words like "tell" or "updates" say nothing about the topic and don't
+    count towards ARCHIVE_MIN_MATCH.
+    """
+    if archive_index is None:
+        return None
+    topic = " ".join(word for word in WORD_PATTERN.findall(query.lower()) if word not in GENERIC_WORDS)
+    with tracing.span("archive_search") as span:
+        try:
+            results = archive_index.search(topic, ARCHIVE_RESULTS, ARCHIVE_MIN_MATCH)
+        except Exception as e:
+            _LOG.error(f"Error searching the news archive: {e}")
+            return None
+        span["results"] = len(results)
+    if not results:
+        return None
+    print(f"Archive search found {len(results)} articles, top score {results[0][0]}")
+    articles = [article for _, article in results]
+    return {"status": "ok", "totalResults": len(articles), "articles": articles, "endpoint": "archive"}
+
+def relevant_news(query, news_data):
+    """
+    news_data with only the articles the embedding index ranks closest to
+    the query; unchanged when the index is off or fails.
+    """
+    if article_index is None or len(news_data.get("articles", [])) <= RELEVANT_ARTICLES:
+        return news_data
+    with tracing.span("retrieval", articles=len(news_data["articles"])) as span:
+        embedded = article_index.embedded
+        try:
+            articles = article_index.select(query, news_data["articles"], RELEVANT_ARTICLES)
+        except Exception as e:
+            _LOG.error(f"Article retrieval failed, using every article: {e}")
+            return news_data
+        span["embedded"] = article_index.embedded - embedded
+        span["kept"] = len(articles)
+    if ARTICLE_INDEX_DIR and span["embedded"]:
+        save_article_index()
+    return {**news_data, "articles": articles}
+
+def save_article_index():
+    """
+    Save the embedding index in the background once ARTICLE_INDEX_SAVE_EVERY
+    articles or ARTICLE_INDEX_SAVE_SECONDS have passed since the last save.
+    Skipped while a save is still running; the next request picks it up.
+    """
+    unsaved = article_index.embedded - last_index_save["embedded"]
+    due = unsaved >= ARTICLE_INDEX_SAVE_EVERY or (
+        unsaved and time.monotonic() - last_index_save["at"] >= ARTICLE_INDEX_SAVE_SECONDS
+    )
+    running = last_index_save["future"] is not None and not last_index_save["future"].done()
+    if not due or running:
+        return
+    last_index_save.update(
+        at=time.monotonic(),
+        embedded=article_index.embedded,
+        future=index_save_executor.submit(article_index.save, ARTICLE_INDEX_DIR),
+    )
+
+def extract_keywords_simple(query):
+    """
+    Extract country and category keywords using the precompiled keyword matcher.
+    """
+    countries, categories = match_keywords(query)
+    country = countries[0] if countries else None
+    category = categories[0] if categories else None
 
     print(f"Extracted Country: {country}, Category: {category}")
     return country, category
 
+def match_keywords(query):
+    """
+    Return every country and category mentioned in the query, in order of
+    appearance and without duplicates, from a single scan of the text.
+    """
+    countries = []
+    categories = []
+    for match in KEYWORD_PATTERN.finditer(query.lower()):
+        kind, value = KEYWORD_LOOKUP[keyword_of(match)]
+        hits = countries if kind == "country" else categories
+        if value not in hits:
+            hits.append(value)
+    return countries, categories
+
+def answer_signature(query):
+    """
+    Signature of what the query asks beyond its country and category, for
+    matching against cached answers.
+    """
+    return query_signature(KEYWORD_PATTERN.sub(" ", query.lower()))
+
+def answer_scope(query):
+    """
+    Every country and every category the query names, sorted, as the
+    answer cache key. extract_keywords_simple keeps only the first of
+    each, so keying on that would hand "india and china politics" the
+    answer cached for "india politics".
+    """
+    countries, categories = match_keywords(query)
+    return tuple(sorted(countries)), tuple(sorted(categories))
+
+def is_generic_query(query):
+    """
+    True when the query asks for nothing beyond its country and category,
+    e.g. "headlines in the united states" or "latest tech news". A query
+    naming two countries or two categories is not: the precomputed summary
+    covers only one pair.
+    """
+    countries, categories = match_keywords(query)
+    if len(countries) > 1 or len(categories) > 1:
+        return False
+    rest = WORD_PATTERN.findall(KEYWORD_PATTERN.sub(" ", query.lower()))
+    return all(word in STOPWORDS or word in GENERIC_WORDS or len(word) <= 1 for word in rest)
+
+def generic_query(country, category):
+    """
+    The query the precomputed summary for (country, category) answers.
+    """
+    words = ["latest", category, "news", f"in {country}" if country else None]
+    return " ".join(word for word in words if word)
+
 def preprocess_query(query):
     """
     Preprocess query to lowercase and remove punctuation.
     """
     return re.sub(r'[^\w\s]', '', query.lower())
 
-def trigger_news_api(country, category):
+def news_requests(country, category):
     """
-    Fetch news articles from NewsAPI based on country and category.
+    The (url, params) of the top-headlines and everything requests for a
+    country and category.
     """
-    base_url = "https://newsapi.org/v2/top-headlines"
-    params = {
+    headlines_url = f"{NEWS_API_URL}/top-headlines"
+    headlines_params = {
+        'apiKey': NEWS_API_KEY,
+    }
+    if country: headlines_params['country'] = COUNTRIES.get(country)
+    if category: headlines_params['category'] = category
+
+    everything_url = f"{NEWS_API_URL}/everything"
+    everything_params = {
         'apiKey': NEWS_API_KEY,
     }
-    
-    if country: params['country'] = COUNTRIES.get(country)
-    if category: params['category'] = category
+    if country: everything_params['q'] = country
+    elif category: everything_params['q'] = category
+    return (headlines_url, headlines_params), (everything_url, everything_params)
+
+def trigger_news_api(country, category):
+    """
+    Fetch news articles from NewsAPI based on country and category.
+    """
+    (headlines_url, headlines_params), (everything_url, everything_params) = news_requests(country, category)
+
+    hint = endpoint_hint(country, category)
+    print(f"Endpoint hint for {country}/{category}: {hint}")
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        news_data = response.json()
-        print(f"News data: ", news_data)
-        if news_data['totalResults'] == 0:
-            base_url = "https://newsapi.org/v2/everything"
-            params = {
-                'apiKey': NEWS_API_KEY,    
-            }
-            if country: params['q'] = country
-            elif category: params['q'] = category
-            response = requests.get(base_url, params=params)
-            response.raise_for_status()
-            news_data = response.json()
-            print("News data v2", news_data)
-            assert news_data['totalResults'] != 0, "No news results" 
+        # settled: whether top-headlines' own answer decided the endpoint, so
+        # the choice is worth learning. Not when it errored or timed out.
+        if hint == "everything":
+            endpoint, news_data, settled = "everything", fetch_news(everything_url, everything_params), True
+        elif hint == "top-headlines" or not NEWS_SPECULATIVE:
+            endpoint, news_data, settled = "top-headlines", fetch_news(headlines_url, headlines_params), True
+            print(f"News data: ", news_data)
+            if news_data['totalResults'] == 0:
+                endpoint, news_data = "everything", fetch_news(everything_url, everything_params)
+        else:
+            endpoint, news_data, settled = fetch_news_speculative(
+                (headlines_url, headlines_params),
+                (everything_url, everything_params),
+            )
+        print(f"News data from {endpoint}", news_data)
+        tracing.annotate(news_endpoint=endpoint, endpoint_hint=hint, total_results=news_data.get('totalResults'))
+        assert news_data['totalResults'] != 0, "No news results"
+        if settled:
+            record_endpoint(country, category, endpoint)
         return news_data
     except requests.exceptions.RequestException as e:
         _LOG.error(f"Error fetching news: {e}")
         return {"error": str(e)}
 
+def fetch_news_speculative(headlines, everything):
+    """
+    Request top-headlines and everything concurrently. Top-headlines is
+    preferred, but as soon as it comes back empty or failed the everything
+    result is used without paying for a second serial round trip.
+
+    Returns (endpoint, news_data, settled), where settled is True only when
+    top-headlines itself answered: with articles, or with totalResults == 0.
+    A 429 or timeout on top-headlines says nothing about the pair, so the
+    everything result it falls back to is not settled.
+    """
+    futures = {
+        fetch_executor.submit(tracing.bind(fetch_news), *headlines): "top-headlines",
+        fetch_executor.submit(tracing.bind(fetch_news), *everything): "everything",
+    }
+    results = {}
+    errors = {}
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=NEWS_API_TIMEOUT, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            endpoint = futures[future]
+            try:
+                results[endpoint] = future.result()
+            except requests.exceptions.RequestException as e:
+                errors[endpoint] = e
+        headlines_data = results.get("top-headlines")
+        if headlines_data is not None and headlines_data.get('totalResults', 0) > 0:
+            return "top-headlines", headlines_data, True
+        if "top-headlines" in results or "top-headlines" in errors:
+            everything_data = results.get("everything")
+            if everything_data is not None and everything_data.get('totalResults', 0) > 0:
+                return "everything", everything_data, "top-headlines" in results
+    if "top-headlines" in results:
+        return "top-headlines", results["top-headlines"], True
+    if "everything" in results:
+        return "everything", results["everything"], False
+    if errors:
+        raise errors.get("top-headlines", errors.get("everything"))
+    raise requests.exceptions.Timeout("NewsAPI did not answer in time")
+
+def endpoint_hint(country, category):
+    """
+    Return the endpoint that has served at least HINT_MIN_SHARE of the recent
+    answers for this (country, category), or None while it's still unclear.
+    """
+    counts = ENDPOINT_HINTS.get((country, category))
+    if not counts:
+        return None
+    total = sum(counts.values())
+    endpoint, hits = counts.most_common(1)[0]
+    if total >= HINT_MIN_SAMPLES and hits / total >= HINT_MIN_SHARE:
+        return endpoint
+    return None
+
+def record_endpoint(country, category, endpoint):
+    """
+    Remember which endpoint answered for this (country, category).
+    """
+    counts = ENDPOINT_HINTS.setdefault((country, category), Counter())
+    counts[endpoint] += 1
+    if sum(counts.values()) >= HINT_WINDOW:
+        del ENDPOINT_HINTS[(country, category)]
+
+def fetch_news(base_url, params):
+    """
+    GET a NewsAPI endpoint, serving repeated (endpoint, country, category, q)
+    requests from the response cache until their TTL runs out.
+    """
+    key = make_cache_key(base_url, params)
+    with tracing.span("newsapi.fetch", endpoint=base_url.rsplit("/", 1)[-1]) as span:
+        news_data = news_cache.get(key)
+        span["cache_hit"] = news_data is not None
+        if news_data is not None:
+            print(f"News cache hit: {key}")
+            return news_data
+        response = http_session.get(base_url, params=params, timeout=NEWS_API_TIMEOUT)
+        span["http_status"] = response.status_code
+        response.raise_for_status()
+        news_data = response.json()
+        if news_data.get('status') == 'ok':
+            news_cache.set(key, news_data)
+        return news_data
+
 def save_news_to_s3(news_data, query):
     """
     Saves news data to S3 with a timestamped filename.
     """
-    s3 = boto3.client("s3")
+    s3 = aws_clients.client("s3")
     current_time = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
     file_name = f"news_{current_time}.json"
     json_data = json.dumps(news_data)
-    s3.put_object(Bucket=INPUT_BUCKET, Key=f"news/{file_name}", Body=json_data)
-    s3.put_object(Bucket=INPUT_BUCKET, Key=QUERY_KEY, Body=json.dumps({'query': query, 'file_name': f"news/{file_name}"}))
+    with tracing.span("s3.put", key="news", bytes=len(json_data)):
+        s3.put_object(Bucket=INPUT_BUCKET, Key=f"news/{file_name}", Body=json_data)
+    with tracing.span("s3.put", key=QUERY_KEY):
+        s3.put_object(Bucket=INPUT_BUCKET, Key=QUERY_KEY, Body=json.dumps({'query': query, 'file_name': f"news/{file_name}"}))
 
     print(f"Saved news data to s3://{INPUT_BUCKET}/news/{file_name}")
     return file_name
 
+def archive_news_async(news_data, query):
+    """
+    Queue save_news_to_s3 on the background worker so the S3 writes never
+    block the response. Lambda freezes the container between invocations,
+    so a queued write may finish at the start of the next warm invocation.
+    """
+    future = archive_executor.submit(tracing.bind(save_news_to_s3), news_data, query)
+    future.add_done_callback(log_archive_result)
+    return future
+
+def log_archive_result(future):
+    """
+    Log failures of a background S3 archive.
+    """
+    error = future.exception()
+    if error is not None:
+        _LOG.error(f"Error archiving news to S3: {error}")
+
 def trigger_sagemaker_processing(file_name):
     """
     Triggers the SageMaker processing job.
     """
-    sagemaker = boto3.client("sagemaker")
+    sagemaker = aws_clients.client("sagemaker")
     try:
         response = sagemaker.create_processing_job(
             ProcessingJobName=PROCESSING_JOB_NAME,
@@ -339,7 +860,7 @@ def wait_for_processing_job():
     """
     Waits for the SageMaker processing job to complete.
     """
-    sagemaker = boto3.client("sagemaker")
+    sagemaker = aws_clients.client("sagemaker")
     waiter = sagemaker.get_waiter("processing_job_completed_or_stopped")
     waiter.wait(ProcessingJobName=PROCESSING_JOB_NAME)
     print("SageMaker processing job completed")
@@ -348,9 +869,10 @@ def retrieve_summary_from_s3():
     """
     Retrieves the summarization result from S3.
     """
-    s3 = boto3.client("s3")
-    response = s3.get_object(Bucket=OUTPUT_BUCKET, Key=SUMMARY_KEY)
-    summary_data = json.loads(response["Body"].read().decode("utf-8"))
+    s3 = aws_clients.client("s3")
+    with tracing.span("s3.get", key=SUMMARY_KEY):
+        response = s3.get_object(Bucket=OUTPUT_BUCKET, Key=SUMMARY_KEY)
+        summary_data = json.loads(response["Body"].read().decode("utf-8"))
     print(f"Retrieved summary from s3://{OUTPUT_BUCKET}/{SUMMARY_KEY}")
     return summary_data.get("summary", "No summary available")
 
@@ -360,28 +882,35 @@ def create_response(status_code, body):
     """
     return {
         "statusCode": status_code,
-        "headers": {
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "*",
-            "Access-Control-Allow-Headers": "*"
-        },
+        "headers": CORS_HEADERS,
         "body": json.dumps(body)
     }
 
-def infer_with_endpoint(query, file_name):
+def build_summary_messages(query, news_data):
+    """
+    Build the Bedrock Converse messages for summarizing the news.
+    """
+    with tracing.span("prompt_build", articles=len(news_data["articles"])) as span:
+        context = build_context(query, news_data["articles"], CONTEXT_TOKEN_BUDGET)
+        p = f"query: {query} Answer in 150 words. "
+        if context:
+            p += f"context: {context}"
+        span["prompt_chars"] = len(p)
+
+    return [
+        {
+        "role": "user",
+        "content": [{"text": p}]
+        }
+    ]
+
+def infer_with_endpoint(query, news_data):
     """
     Sends a request to the inference endpoint to process the summarization.
     """
-    # S3 client to fetch news data
-    s3 = boto3.client("s3")
-    print(f"File name verification: {file_name}")
-    response = s3.get_object(Bucket=INPUT_BUCKET, Key=f"news/{file_name}")
-    news_data = json.loads(response["Body"].read().decode("utf-8"))
     print("Inferring with endpoints:", news_data)
     # Prepare payload for the endpoint
-    context = ""
-    for article in news_data["articles"]:
-        context += f"{article['title']}: {article['description']}\n"
+    messages = build_summary_messages(query, news_data)
     # payload = {
     #     "question": query, #"Summarize the news articles",
     #     "context": context,
@@ -394,20 +923,17 @@ def infer_with_endpoint(query, file_name):
         # headers = {"Content-Type": "application/json"}
         # response = requests.post(endpoint_url, headers=headers, json=payload)
         # response.raise_for_status()
-        p = f"query: {query} Answer in 150 words. "
-        if context:
-            p += f"context: {context}"
-
-        messages = [
-            {
-            "role": "user",
-            "content": [{"text": p}]
-            }
-        ]
-        response = bedrock_runtime.converse(
-                modelId=MODEL_ID,
-                messages=messages
-            )
+        bedrock_runtime = aws_clients.client("bedrock-runtime", region_name='us-east-1')
+        with tracing.span("bedrock", model=MODEL_ID) as span:
+            response = bedrock_runtime.converse(
+                    modelId=MODEL_ID,
+                    messages=messages
+                )
+            usage = response.get('usage', {})
+            span["input_tokens"] = usage.get('inputTokens')
+            span["output_tokens"] = usage.get('outputTokens')
+        tracing.count("input_tokens", usage.get('inputTokens', 0))
+        tracing.count("output_tokens", usage.get('outputTokens', 0))
         generated_text = response['output']['message']['content'][0]['text']
         # result = response.json()
         # print(f"Inference result: {result}")
@@ -416,3 +942,20 @@ def infer_with_endpoint(query, file_name):
     except requests.exceptions.RequestException as e:
         _LOG.error(f"Error calling inference endpoint: {e}")
         return {"error": str(e)}
+
+def stream_with_endpoint(query, news_data):
+    """
+    Same prompt as infer_with_endpoint, but yields the summary text piece by
+    piece from converse_stream as Bedrock generates it.
+    """
+    messages = build_summary_messages(query, news_data)
+    bedrock_runtime = aws_clients.client("bedrock-runtime", region_name='us-east-1')
+    response = bedrock_runtime.converse_stream(
+            modelId=MODEL_ID,
+            messages=messages
+        )
+    for event in response['stream']:
+        if 'contentBlockDelta' in event:
+            yield event['contentBlockDelta']['delta'].get('text', '')
+        elif 'metadata' in event:
+            print(f"Stream usage: {event['metadata'].get('usage')}")
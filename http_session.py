@@ -0,0 +1,90 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool settings, shared by every outbound HTTP call in the Lambdas
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))  # connections kept per host
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", "0.3"))  # seconds, doubled per retry
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "10"))
+
+_session = None
+_session_lock = threading.Lock()
+_request_count = 0
+
+
+def get_session():
+    """
+    Return the module-level pooled session, creating it on first use. It is
+    kept for the lifetime of the container, so warm invocations reuse open
+    keep-alive connections instead of paying TCP+TLS setup again.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def build_session():
+    """
+    Create a session with a bounded connection pool and retries with backoff
+    on connection errors and 5xx responses.
+    """
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(count_request)
+    return session
+
+
+def count_request(response, *args, **kwargs):
+    """
+    Response hook that counts requests for session_stats.
+    """
+    global _request_count
+    _request_count += 1
+
+
+def get(url, **kwargs):
+    """
+    requests.get through the pooled session with default connect/read timeouts.
+    """
+    kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    return get_session().get(url, **kwargs)
+
+
+def session_stats():
+    """
+    Report how many requests were served and how many TCP connections were
+    opened for them; reuse_ratio is the share of requests that rode an
+    existing connection.
+    """
+    connections = 0
+    if _session is not None:
+        # http:// and https:// share one adapter, count its pools once
+        for adapter in set(_session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+    reuse_ratio = 1 - connections / _request_count if _request_count else 0.0
+    return {
+        "requests": _request_count,
+        "connections": connections,
+        "reuse_ratio": round(max(reuse_ratio, 0.0), 3),
+    }
@@ -0,0 +1,265 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from PIL import Image, ImageFile
+
+import http_session
+
+# Llama 3.2 vision accepts images up to 1120 px on the longer side
+MAX_IMAGE_SIDE = 1120
+IMAGE_CACHE_BYTES = int(os.environ.get("IMAGE_CACHE_BYTES", str(64 * 1024 * 1024)))
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR", "")  # e.g. /tmp/image_cache
+# Size cap of the directory tier; Lambda's /tmp is 512 MB by default
+IMAGE_CACHE_DISK_BYTES = int(os.environ.get("IMAGE_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+# Downloads are streamed and abandoned as soon as they pass either limit
+MAX_IMAGE_BYTES = int(os.environ.get("MAX_IMAGE_BYTES", str(15 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.environ.get("MAX_IMAGE_PIXELS", str(50 * 1000 * 1000)))
+# URLs whose ETag and digest are remembered for conditional re-fetches
+IMAGE_URL_INDEX_ENTRIES = int(os.environ.get("IMAGE_URL_INDEX_ENTRIES", "10000"))
+DOWNLOAD_CHUNK = 64 * 1024
+HEADER_PEEK_BYTES = 1024 * 1024  # give up if no image header shows up in this much data
+# Formats the Bedrock Converse API takes as-is; anything else is re-encoded as PNG
+BEDROCK_FORMATS = {"JPEG": "jpeg", "MPO": "jpeg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+
+
+class ImageCache:
+    """
+    Model-ready images keyed by the SHA-256 of the original download, in a
+    byte-bounded LRU with an optional directory tier (Lambda's /tmp). The
+    directory tier is byte-bounded too: an in-memory index of its files,
+    in LRU order, finds a file without listing the directory and says
+    which files to delete when it outgrows max_disk_bytes.
+    """
+
+    def __init__(self, max_bytes=IMAGE_CACHE_BYTES, disk_dir=IMAGE_CACHE_DIR, max_disk_bytes=IMAGE_CACHE_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.size = 0
+        self.disk_size = 0
+        self._entries = OrderedDict()
+        self._disk = OrderedDict()  # digest -> (format, bytes)
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.index_disk()
+
+    def index_disk(self):
+        """
+        Index the files an earlier run of this container left behind,
+        oldest first, and trim them to max_disk_bytes.
+        """
+        found = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".tmp"):
+                os.remove(entry.path)
+                continue
+            digest, _, image_format = entry.name.partition(".")
+            stat = entry.stat()
+            found.append((stat.st_mtime, digest, image_format, stat.st_size))
+        with self._lock:
+            for _, digest, image_format, size in sorted(found):
+                self._disk[digest] = (image_format, size)
+                self.disk_size += size
+            self.evict_disk()
+
+    def disk_path(self, digest, image_format):
+        return os.path.join(self.disk_dir, f"{digest}.{image_format}")
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                return entry
+            on_disk = self._disk.get(digest)
+            if on_disk is None:
+                return None
+            self._disk.move_to_end(digest)
+        image_format = on_disk[0]
+        try:
+            with open(self.disk_path(digest, image_format), "rb") as f:
+                entry = (f.read(), image_format)
+        except FileNotFoundError:
+            with self._lock:
+                if self._disk.pop(digest, None) is not None:
+                    self.disk_size -= on_disk[1]
+            return None
+        self.put_memory(digest, entry)
+        return entry
+
+    def set(self, digest, image_bytes, image_format):
+        entry = (image_bytes, image_format)
+        self.put_memory(digest, entry)
+        if self.disk_dir and len(image_bytes) <= self.max_disk_bytes:
+            path = self.disk_path(digest, image_format)
+            with open(path + ".tmp", "wb") as f:
+                f.write(image_bytes)
+            os.replace(path + ".tmp", path)
+            with self._lock:
+                previous = self._disk.pop(digest, None)
+                if previous is not None:
+                    self.disk_size -= previous[1]
+                self._disk[digest] = (image_format, len(image_bytes))
+                self.disk_size += len(image_bytes)
+                self.evict_disk()
+
+    def evict_disk(self):
+        """
+        Delete least recently used files until the directory tier fits
+        max_disk_bytes. Caller holds the lock.
+        """
+        while self.disk_size > self.max_disk_bytes and self._disk:
+            digest, (image_format, size) = self._disk.popitem(last=False)
+            self.disk_size -= size
+            try:
+                os.remove(self.disk_path(digest, image_format))
+            except FileNotFoundError:
+                pass
+
+    def put_memory(self, digest, entry):
+        with self._lock:
+            if digest in self._entries:
+                self.size -= len(self._entries.pop(digest)[0])
+            self._entries[digest] = entry
+            self.size += len(entry[0])
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted[0])
+
+
+class URLIndex:
+    """
+    URL -> (ETag, digest) of the last download, in an LRU bounded to
+    max_entries so a long-lived container doesn't grow it forever.
+    """
+
+    def __init__(self, max_entries=IMAGE_URL_INDEX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def set(self, url, etag, digest):
+        with self._lock:
+            self._entries[url] = (etag, digest)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+image_cache = ImageCache()
+_url_index = URLIndex()
+
+
+class ImageRejected(Exception):
+    """
+    The image can't be sent to the model (too large, or not an image).
+    """
+
+
+def load_image(url):
+    """
+    Return (bytes, format) of the image at url, ready for the model.
+    A URL seen before is revalidated with If-None-Match, so an unchanged
+    image costs one 304 and no decoding at all.
+    """
+    known = _url_index.get(url)
+    headers = {}
+    if known and known[0]:
+        headers["If-None-Match"] = known[0]
+    status, etag, image_bytes, size, image_format = download_image(url, headers)
+    if status == 304 and known:
+        cached = image_cache.get(known[1])
+        if cached is not None:
+            return cached
+        status, etag, image_bytes, size, image_format = download_image(url, {})
+
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    _url_index.set(url, etag, digest)
+    cached = image_cache.get(digest)
+    if cached is not None:
+        return cached
+
+    if max(size) <= MAX_IMAGE_SIDE and image_format in BEDROCK_FORMATS:
+        # Already small enough: send the downloaded bytes without re-encoding
+        prepared = (image_bytes, BEDROCK_FORMATS[image_format])
+    else:
+        prepared = resize_for_model(image_bytes)
+    image_cache.set(digest, *prepared)
+    return prepared
+
+
+def download_image(url, headers):
+    """
+    Stream the image at url into memory, giving up early on a Content-Length
+    or running size over MAX_IMAGE_BYTES. The header is parsed from the first
+    chunks, so images with too many pixels or that aren't images at all are
+    rejected before the rest is downloaded.
+    Returns (status, etag, bytes, (width, height), format).
+    """
+    with http_session.get(url, headers=headers, stream=True) as response:
+        if response.status_code == 304:
+            return 304, response.headers.get("ETag"), b"", (0, 0), None
+        response.raise_for_status()
+        length = response.headers.get("Content-Length")
+        if length and int(length) > MAX_IMAGE_BYTES:
+            raise ImageRejected(f"Image is {length} bytes, limit is {MAX_IMAGE_BYTES}")
+
+        parser = ImageFile.Parser()
+        data = bytearray()
+        size = None
+        image_format = None
+        for chunk in response.iter_content(DOWNLOAD_CHUNK):
+            data += chunk
+            if len(data) > MAX_IMAGE_BYTES:
+                raise ImageRejected(f"Image is over the {MAX_IMAGE_BYTES} byte limit")
+            if size is None:
+                parser.feed(chunk)
+                if parser.image is not None:
+                    size = parser.image.size
+                    image_format = parser.image.format
+                    if size[0] * size[1] > MAX_IMAGE_PIXELS:
+                        raise ImageRejected(f"Image is {size[0]}x{size[1]} pixels")
+                elif len(data) > HEADER_PEEK_BYTES:
+                    raise ImageRejected("Response is not a readable image")
+        if size is None:
+            raise ImageRejected("Response is not a readable image")
+        return response.status_code, response.headers.get("ETag"), bytes(data), size, image_format
+
+
+def resize_for_model(image_bytes, max_side=MAX_IMAGE_SIDE):
+    """
+    Shrink an image so its longer side is at most max_side. JPEGs are
+    decoded at reduced scale with draft(); other formats use reducing_gap,
+    which does a cheap integer reduce() before the final LANCZOS pass.
+    """
+    image = Image.open(BytesIO(image_bytes))
+    image_format = image.format
+    width, height = image.size
+    if max(width, height) > max_side:
+        # Determine the scaling factor to make the longer side max_side pixels
+        scaling_factor = max_side / max(width, height)
+        new_size = (int(width * scaling_factor), int(height * scaling_factor))
+        if image_format in ("JPEG", "MPO"):
+            image.draft(image.mode, new_size)
+        image = image.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    if image_format not in BEDROCK_FORMATS:
+        image_format = "PNG"
+        if image.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+            image = image.convert("RGB")
+    output = BytesIO()
+    image.save(output, format="JPEG" if image_format == "MPO" else image_format)
+    return output.getvalue(), BEDROCK_FORMATS[image_format]
@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import hquery
+import http_session
+from news_snapshots import compact_snapshot, snapshot_digest
+
+_LOG = logging.getLogger()
+
+# NewsAPI requests one run may spend, and how fast it may spend them
+PREFETCH_BUDGET = int(os.environ.get("PREFETCH_BUDGET", "60"))
+PREFETCH_RATE = float(os.environ.get("PREFETCH_RATE", "5"))  # requests per second
+PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", "4"))
+# Snapshots younger than this are left alone
+PREFETCH_MIN_AGE = int(os.environ.get("PREFETCH_MIN_AGE", "300"))  # seconds
+# Old query counts fade by this factor every run, so weights follow current interest
+PREFETCH_DECAY = float(os.environ.get("PREFETCH_DECAY", "0.9"))
+# Weight of a grid pair nobody has asked for yet, so it is still refreshed now and then
+PRIOR_WEIGHT = 0.1
+MAX_AGE_CREDIT = 24 * 3600  # a missing snapshot counts as a day old
+# Write the generic-query summary into each snapshot whose articles changed
+PREFETCH_SUMMARIES = os.environ.get("PREFETCH_SUMMARIES", "1") == "1"
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the prefetch workers: at most rate requests per
+    second, with no burst beyond one request.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class Budget:
+    """
+    Counts NewsAPI requests against the per-run budget.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+
+def grid(weights):
+    """
+    Every COUNTRIES x CATEGORIES pair, plus the country-only and
+    category-only pairs that queries have actually produced.
+    """
+    pairs = {(country, category) for country in hquery.COUNTRIES for category in hquery.CATEGORIES}
+    return pairs | set(weights)
+
+
+def plan(store, weights, now):
+    """
+    Pairs worth refreshing, most valuable first: weight times age, so a
+    popular pair is refreshed long before an unpopular one goes equally stale.
+    Returns [(priority, country, category, previous snapshot)] and the ages.
+    """
+    candidates = []
+    ages = {}
+    for country, category in grid(weights):
+        previous = store.load(country, category)
+        age = now - previous["fetchedAt"] if previous else float("inf")
+        ages[(country, category)] = age
+        if age < PREFETCH_MIN_AGE:
+            continue
+        priority = (weights.get((country, category), 0) + PRIOR_WEIGHT) * min(age, MAX_AGE_CREDIT)
+        candidates.append((priority, country, category, previous))
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+    return candidates, ages
+
+
+def fetch_snapshot(country, category, previous, limiter, budget):
+    """
+    Fetch top-headlines, falling back to everything when it comes back
+    empty. A pair whose last snapshot came from everything goes straight
+    there. Returns a compact snapshot, or None when the budget ran out or
+    nothing was found.
+    """
+    headlines, everything = hquery.news_requests(country, category)
+    order = [("top-headlines", headlines), ("everything", everything)]
+    if previous and previous.get("endpoint") == "everything":
+        order.reverse()
+    for endpoint, (url, params) in order:
+        if not budget.take():
+            return None
+        limiter.acquire()
+        response = http_session.get(url, params=params, timeout=hquery.NEWS_API_TIMEOUT)
+        response.raise_for_status()
+        news_data = response.json()
+        if news_data.get("status") == "ok" and news_data.get("totalResults", 0) > 0:
+            snapshot = compact_snapshot(news_data, endpoint)
+            if snapshot["articles"]:
+                return snapshot
+    return None
+
+
+def summarize_snapshot(country, category, snapshot, previous):
+    """
+    Attach the summary for the pair's generic query to the snapshot. It is
+    carried over when the articles haven't changed, otherwise generated
+    with the request path's own prompt. Returns True if Bedrock was called.
+    """
+    snapshot["digest"] = snapshot_digest(snapshot)
+    if previous and previous.get("digest") == snapshot["digest"] and previous.get("summary"):
+        snapshot["summary"] = previous["summary"]
+        snapshot["summarizedAt"] = previous.get("summarizedAt")
+        return False
+    summary = hquery.infer_with_endpoint(hquery.generic_query(country, category), snapshot)
+    if isinstance(summary, str):
+        snapshot["summary"] = summary
+        snapshot["summarizedAt"] = time.time()
+    return True
+
+
+def run_prefetch(store, budget=PREFETCH_BUDGET, rate=PREFETCH_RATE, workers=PREFETCH_WORKERS):
+    """
+    Refresh the most valuable snapshots within budget NewsAPI requests and
+    return a report of what was done and how fresh the grid now is.
+    """
+    started = time.time()
+    weights = store.load_weights(PREFETCH_DECAY)
+    candidates, ages = plan(store, weights, started)
+    limiter = RateLimiter(rate)
+    spend = Budget(budget)
+    results = {"refreshed": 0, "empty": 0, "failed": 0}
+    summarized = []
+
+    def refresh(candidate):
+        _, country, category, previous = candidate
+        try:
+            snapshot = fetch_snapshot(country, category, previous, limiter, spend)
+        except Exception as e:
+            _LOG.error(f"Prefetch of {country}/{category} failed: {e}")
+            return "failed"
+        if snapshot is None:
+            return "empty"
+        if PREFETCH_SUMMARIES:
+            try:
+                if summarize_snapshot(country, category, snapshot, previous):
+                    summarized.append((country, category))
+            except Exception as e:
+                _LOG.error(f"Summary of {country}/{category} failed: {e}")
+        store.save(country, category, snapshot)
+        ages[(country, category)] = time.time() - snapshot["fetchedAt"]
+        return "refreshed"
+
+    # Each pair costs at least one request, so there is no point queueing more than the budget
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for outcome in pool.map(refresh, candidates[:budget]):
+            results[outcome] += 1
+
+    total_weight = sum(weights.values())
+    fresh = {pair for pair, age in ages.items() if age <= store.max_age}
+    report = {
+        **results,
+        "requests": spend.used,
+        "summarized": len(summarized),
+        "budget": budget,
+        "seconds": round(time.time() - started, 2),
+        "grid_pairs": len(ages),
+        "fresh_pairs": len(fresh),
+        # Share of recent queries that would find a fresh snapshot right now
+        "weighted_coverage": round(sum(weights[pair] for pair in fresh if pair in weights) / total_weight, 3)
+        if total_weight else None,
+    }
+    print(json.dumps({"prefetch": report}))
+    return report
+
+
+def lambda_handler(event, context):
+    """
+    Entry point for the scheduled (EventBridge) prefetch run.
+    """
+    return run_prefetch(hquery.snapshots)
+
+
+if __name__ == "__main__":
+    run_prefetch(hquery.snapshots)
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+
+import aws_clients
+from news_cache import MemoryCache
+
+SNAPSHOT_ARTICLES = 50  # articles kept per snapshot
+ARTICLE_FIELDS = ("title", "description", "url", "publishedAt")
+COUNTS_PREFIX = "counts/"
+COUNTS_TOTAL = "counts/total.json"
+
+
+def snapshot_key(country, category):
+    return f"snapshots/{country or '_'}/{category or '_'}.json"
+
+
+def compact_snapshot(news_data, endpoint, fetched_at=None):
+    """
+    Reduce a NewsAPI response to what the request path uses: usable,
+    de-duplicated articles with only the fields the prompt and archive need.
+    """
+    articles = []
+    seen = set()
+    for article in news_data.get("articles", []):
+        title = (article.get("title") or "").strip()
+        if not title or not article.get("description") or title == "[Removed]" or title in seen:
+            continue
+        seen.add(title)
+        compact = {field: article.get(field) for field in ARTICLE_FIELDS}
+        compact["source"] = {"name": (article.get("source") or {}).get("name")}
+        articles.append(compact)
+        if len(articles) == SNAPSHOT_ARTICLES:
+            break
+    return {
+        "status": "ok",
+        "totalResults": len(articles),
+        "articles": articles,
+        "endpoint": endpoint,
+        "fetchedAt": time.time() if fetched_at is None else fetched_at,
+    }
+
+
+def snapshot_digest(snapshot):
+    """
+    Fingerprint of a snapshot's articles, to tell whether a refresh changed
+    anything worth re-summarizing.
+    """
+    digest = hashlib.sha256()
+    for article in snapshot["articles"]:
+        digest.update(f"{article.get('url')}|{article.get('title')}|{article.get('description')}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SnapshotStore:
+    """
+    Prebuilt news snapshots per (country, category), written by the prefetch
+    job (news_prefetch.py) and read on the request path. Lives in an S3
+    bucket or, for local runs, a directory. Reads go through a short
+    in-process cache so a warm container doesn't GET the same snapshot on
+    every request.
+
+    Also counts which (country, category) pairs are asked for. Each process
+    accumulates counts in memory and flushes them as small delta files that
+    the prefetch job folds into its weights.
+    """
+
+    def __init__(self, bucket=None, directory=None, prefix="", max_age=900, read_ttl=60, flush_every=50):
+        self.bucket = bucket
+        self.directory = directory
+        self.prefix = prefix
+        self.max_age = max_age  # seconds a snapshot may be served for
+        self.flush_every = flush_every
+        self.read_cache = MemoryCache(max_entries=512, ttl=read_ttl)
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.served_age = 0.0
+        self.process_id = uuid.uuid4().hex[:12]
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.bucket or self.directory)
+
+    def read(self, key):
+        if self.bucket:
+            s3 = aws_clients.client("s3")
+            try:
+                return s3.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read()
+            except s3.exceptions.NoSuchKey:
+                return None
+        path = os.path.join(self.directory, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def write(self, key, body):
+        if self.bucket:
+            aws_clients.client("s3").put_object(Bucket=self.bucket, Key=self.prefix + key, Body=body)
+            return
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(path + ".tmp", path)
+
+    def delete(self, key):
+        if self.bucket:
+            aws_clients.client("s3").delete_object(Bucket=self.bucket, Key=self.prefix + key)
+        else:
+            os.remove(os.path.join(self.directory, key))
+
+    def list(self, prefix):
+        if self.bucket:
+            paginator = aws_clients.client("s3").get_paginator("list_objects_v2")
+            keys = []
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+                keys.extend(item["Key"][len(self.prefix):] for item in page.get("Contents", []))
+            return keys
+        root = os.path.join(self.directory, prefix)
+        if not os.path.isdir(root):
+            return []
+        return [prefix + name for name in os.listdir(root) if name.endswith(".json")]
+
+    def load(self, country, category):
+        """
+        The stored snapshot for (country, category), whatever its age, or None.
+        """
+        body = self.read(snapshot_key(country, category))
+        return json.loads(body) if body is not None else None
+
+    def save(self, country, category, snapshot):
+        self.write(snapshot_key(country, category), json.dumps(snapshot).encode("utf-8"))
+        self.read_cache.set(snapshot_key(country, category), snapshot)
+
+    def get(self, country, category):
+        """
+        The snapshot for (country, category) if there is one younger than
+        max_age, else None. Counts hits, misses and the age of what was served.
+        """
+        key = snapshot_key(country, category)
+        snapshot = self.read_cache.get(key)
+        if snapshot is None:
+            snapshot = self.load(country, category)
+            if snapshot is not None:
+                self.read_cache.set(key, snapshot)
+        with self._lock:
+            if snapshot is None:
+                self.misses += 1
+                return None
+            age = time.time() - snapshot["fetchedAt"]
+            if age > self.max_age or not snapshot["articles"]:
+                self.misses += 1
+                self.stale += 1
+                return None
+            self.hits += 1
+            self.served_age += age
+        return snapshot
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "mean_age_s": round(self.served_age / self.hits, 1) if self.hits else None,
+        }
+
+    def record_query(self, country, category):
+        """
+        Count a query for (country, category). Returns True when enough
+        counts have built up that flush_counts should run.
+        """
+        with self._lock:
+            self._counts[(country, category)] += 1
+            return sum(self._counts.values()) >= self.flush_every
+
+    def flush_counts(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+        body = json.dumps([[country, category, n] for (country, category), n in counts.items()])
+        self.write(f"{COUNTS_PREFIX}{self.process_id}-{time.time_ns()}.json", body.encode("utf-8"))
+
+    def load_weights(self, decay=1.0):
+        """
+        Fold every count delta into counts/total.json (after multiplying the
+        old totals by decay, so interest shifts over time) and return the
+        totals as {(country, category): weight}.
+        """
+        body = self.read(COUNTS_TOTAL)
+        weights = Counter()
+        if body is not None:
+            for country, category, weight in json.loads(body):
+                weights[(country, category)] = weight * decay
+        deltas = [key for key in self.list(COUNTS_PREFIX) if key != COUNTS_TOTAL]
+        for key in deltas:
+            for country, category, n in json.loads(self.read(key)):
+                weights[(country, category)] += n
+        self.write(COUNTS_TOTAL, json.dumps([[c, k, w] for (c, k), w in weights.items()]).encode("utf-8"))
+        for key in deltas:
+            self.delete(key)
+        return weights
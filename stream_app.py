@@ -0,0 +1,73 @@
+from flask import Flask, Response, jsonify, request, stream_with_context
+import logging
+
+import hquery
+import tracing
+
+# Streaming front door for the news summarizer. Lambda's buffered proxy
+# integration can't flush partial bodies from Python, so this app runs
+# behind the AWS Lambda Web Adapter with AWS_LWA_INVOKE_MODE=response_stream
+# (or any chunked-HTTP host) and is exposed through a Function URL.
+app = Flask(__name__)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def cors(response):
+    response.headers.update(hquery.CORS_HEADERS)
+    return response
+
+
+@app.route('/stream', methods=['GET'])
+def stream():
+    """
+    Answer ?q= like hquery.lambda_handler, but send the summary as a chunked
+    text/plain body while Bedrock is still generating it.
+    """
+    query = request.args.get("q")
+    trace = tracing.start_trace("news_stream")
+    try:
+        summary, news_data, cache_key = hquery.prepare_summary(query)
+    except hquery.QueryRejected as e:
+        tracing.finish_trace(trace, status=400)
+        return cors(jsonify({"error": str(e)})), 400
+    except Exception as e:
+        logger.error(f"Error: {str(e)}", exc_info=True)
+        tracing.finish_trace(trace, status=500)
+        return cors(jsonify({"error": "Internal server error"})), 500
+    if summary is not None:
+        tracing.finish_trace(trace, status=200)
+        return cors(Response(summary, mimetype="text/plain"))
+
+    def generate():
+        parts = []
+        status = 200
+        try:
+            with tracing.span("bedrock", model=hquery.MODEL_ID, stream=True):
+                for text in hquery.stream_with_endpoint(query, news_data):
+                    if text:
+                        parts.append(text)
+                        yield text
+            if cache_key is not None:
+                hquery.answer_cache.set(*cache_key, "".join(parts))
+        except Exception as e:
+            # Headers are already sent, so all we can do is end the body
+            logger.error(f"Streaming error: {e}", exc_info=True)
+            status = 500
+            yield "\n[stream interrupted]"
+        finally:
+            tracing.finish_trace(trace, status=status)
+
+    response = Response(stream_with_context(tracing.bind_iter(trace, generate())), mimetype="text/plain")
+    response.headers["Cache-Control"] = "no-cache"
+    return cors(response)
+
+
+@app.route('/stream', methods=['OPTIONS'])
+def stream_preflight():
+    return cors(Response(status=204))
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=8080, threaded=True)
@@ -0,0 +1,184 @@
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Share of traces written to the log; slow and failed requests are always written
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "1"))
+TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", "3000"))
+TRACE_NAMESPACE = os.environ.get("TRACE_NAMESPACE", "NewsChatBot")
+
+_current = contextvars.ContextVar("trace", default=None)
+# Callables given every finished trace's record, logged or not (benchmarks collect them here)
+listeners = []
+
+
+class Trace:
+    """
+    Spans and counters for one request, written at the end as a single JSON
+    line in CloudWatch Embedded Metric Format: the per-stage times and
+    counters become metrics, the full span list stays in the log record.
+    """
+
+    def __init__(self, name, sampled):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.timestamp = int(time.time() * 1000)
+        self.attributes = {}
+        self.counters = {}
+        self.spans = []
+        self.emitted = False
+        self._lock = threading.Lock()
+
+    def add_span(self, span):
+        with self._lock:
+            if not self.emitted:
+                self.spans.append(span)
+                return
+        # Finished after the response went out (background work): log it on its own
+        if self.sampled:
+            print(json.dumps({"trace_id": self.trace_id, "trace": self.name, "late_span": span}))
+
+    def count(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, total_ms):
+        stages = {}
+        for span in self.spans:
+            key = f"{span['name']}_ms"
+            stages[key] = round(stages.get(key, 0) + span["ms"], 3)
+        metrics = [{"Name": "total_ms", "Unit": "Milliseconds"}]
+        metrics += [{"Name": key, "Unit": "Milliseconds"} for key in stages]
+        metrics += [{"Name": key, "Unit": "Count"} for key in self.counters]
+        return {
+            "_aws": {
+                "Timestamp": self.timestamp,
+                "CloudWatchMetrics": [{
+                    "Namespace": TRACE_NAMESPACE,
+                    "Dimensions": [["trace"]],
+                    "Metrics": metrics,
+                }],
+            },
+            "trace": self.name,
+            "trace_id": self.trace_id,
+            "total_ms": round(total_ms, 3),
+            **stages,
+            **self.counters,
+            **self.attributes,
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+        }
+
+
+def start_trace(name, **attributes):
+    """
+    Begin a trace for the current request and make it the one span() and
+    the other helpers record into.
+    """
+    trace = Trace(name, random.random() < TRACE_SAMPLE_RATE)
+    trace.attributes.update(attributes)
+    trace.token = _current.set(trace)
+    return trace
+
+
+def finish_trace(trace, **attributes):
+    """
+    Stop the trace and log it if it was sampled, failed or ran slow.
+    Returns the record, or None if it wasn't logged.
+    """
+    total_ms = (time.perf_counter() - trace.started) * 1000
+    try:
+        _current.reset(trace.token)
+    except (ValueError, RuntimeError):
+        # Finished from another context (the body of a streamed response)
+        _current.set(None)
+    trace.attributes.update(attributes)
+    with trace._lock:
+        trace.emitted = True
+        failed = any("error" in span for span in trace.spans) or trace.attributes.get("status", 200) >= 500
+        logged = trace.sampled or failed or total_ms >= TRACE_SLOW_MS
+        trace.sampled = logged
+        record = trace.record(total_ms) if logged or listeners else None
+    for listener in listeners:
+        listener(record)
+    if not logged:
+        return None
+    print(json.dumps(record, default=str))
+    return record
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time the block as a span of the current trace. Yields the span's dict so
+    the block can add attributes (token counts, cache hits); without a
+    current trace it records nothing.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield {}
+        return
+    start = time.perf_counter()
+    record = {"name": name, "start_ms": round((start - trace.started) * 1000, 3), **attributes}
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["ms"] = round((time.perf_counter() - start) * 1000, 3)
+        record["thread"] = threading.current_thread().name
+        trace.add_span(record)
+
+
+def annotate(**attributes):
+    """
+    Attach attributes to the current trace.
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def count(name, value=1):
+    """
+    Add to a per-request counter (emitted as a Count metric).
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.count(name, value)
+
+
+def bind(fn):
+    """
+    Wrap fn so it runs in the caller's trace when submitted to an executor.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def bind_iter(trace, iterable):
+    """
+    Iterate in trace's context and stop it being current here, for a
+    streamed response body that the server consumes after the view has
+    returned. The body is then where finish_trace is called.
+    """
+    context = contextvars.copy_context()
+    _current.reset(trace.token)
+
+    def run():
+        iterator = iter(iterable)
+        while True:
+            try:
+                item = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield item
+
+    return run()